@@ -0,0 +1,122 @@
+# Parking App V1/allocator.py
+import threading
+from models.models import db, ParkingSpot
+
+# Default placement strategy, overridden by SPOT_ALLOCATION_STRATEGY in app.config
+SPOT_ALLOCATION_STRATEGY = 'first_free'
+
+def bit_reverse(value, bits):
+    result = 0
+    for _ in range(bits):
+        result = (result << 1) | (value & 1)
+        value >>= 1
+    return result
+
+def first_free_order(cells, rows, cols):
+    """Lowest spot id first, which is what booking did before strategies existed."""
+    return sorted(cells)
+
+def nearest_to_entrance_order(cells, rows, cols):
+    """Shortest walk from the entrance at the front-left corner (row 0, column 0)."""
+    return sorted(cells, key=lambda cell: (cell[1] + cell[2], cell[1], cell[2]))
+
+def fill_row_first_order(cells, rows, cols):
+    """Front row left to right, then the next row."""
+    return sorted(cells, key=lambda cell: (cell[1], cell[2], cell[0]))
+
+def spread_out_order(cells, rows, cols):
+    """Bit-reversed grid index, so each new car lands as far as possible from the ones already parked."""
+    bits = max(1, max((row * cols + col for _, row, col in cells), default=0).bit_length())
+    return sorted(cells, key=lambda cell: (bit_reverse(cell[1] * cols + cell[2], bits), cell[0]))
+
+# Each strategy turns (spot_id, row, col) cells into preference order, best first
+STRATEGIES = {
+    'first_free': first_free_order,
+    'nearest_to_entrance': nearest_to_entrance_order,
+    'fill_row_first': fill_row_first_order,
+    'spread_out': spread_out_order,
+}
+
+class LotAllocator:
+    """Free spots of one lot as a bitmap over preference ranks; the lowest set bit is the best free spot."""
+
+    def __init__(self, strategy, spots, rows, cols):
+        order = STRATEGIES[strategy]([(spot_id, row, col) for spot_id, row, col, _ in spots], rows, cols)
+        self.spot_ids = [spot_id for spot_id, _, _ in order]
+        self.ranks = {spot_id: rank for rank, spot_id in enumerate(self.spot_ids)}
+        available = {spot_id for spot_id, _, _, status in spots if status == 'A'}
+        self.free = 0
+        for rank, spot_id in enumerate(self.spot_ids):
+            if spot_id in available:
+                self.free |= 1 << rank
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes the best free spot off the bitmap and returns its id, or None when none is left."""
+        with self._lock:
+            if not self.free:
+                return None
+            lowest = self.free & -self.free
+            self.free ^= lowest
+            return self.spot_ids[lowest.bit_length() - 1]
+
+    def release(self, spot_id):
+        """Marks the spot free again; unknown ids (e.g. None or a spot added since loading) are ignored."""
+        rank = self.ranks.get(spot_id)
+        if rank is not None:
+            with self._lock:
+                self.free |= 1 << rank
+
+    def free_count(self):
+        return bin(self.free).count('1')
+
+class SpotAllocators:
+    """Lazily builds one LotAllocator per lot from ParkingSpot.status, so a restart starts from the database."""
+
+    def __init__(self, strategy=SPOT_ALLOCATION_STRATEGY):
+        self._lock = threading.Lock()
+        self._lots = {}
+        self.configure(strategy)
+
+    def configure(self, strategy):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown spot allocation strategy '{strategy}'; choose from {', '.join(STRATEGIES)}")
+        with self._lock:
+            self.strategy = strategy
+            self._lots = {}
+
+    def get(self, lot):
+        with self._lock:
+            allocator = self._lots.get(lot.id)
+        if allocator is None:
+            allocator = self.load(lot)
+        return allocator
+
+    def load(self, lot):
+        """Rebuilds the lot's bitmap from the spots table and installs it."""
+        spots = db.session.query(
+            ParkingSpot.id, ParkingSpot.row_position, ParkingSpot.col_position, ParkingSpot.status
+        ).filter_by(lot_id=lot.id).all()
+        allocator = LotAllocator(self.strategy, spots, lot.layout_rows, lot.layout_cols)
+        with self._lock:
+            self._lots[lot.id] = allocator
+        return allocator
+
+    def release(self, lot_id, spot_id):
+        """Returns a spot to its lot's bitmap. Call after the commit that freed it."""
+        with self._lock:
+            allocator = self._lots.get(lot_id)
+        if allocator is not None:
+            allocator.release(spot_id)
+
+    def reset(self, lot_id):
+        """Forgets a lot whose spots were added, removed or deleted; it is rebuilt on next use."""
+        with self._lock:
+            self._lots.pop(lot_id, None)
+
+allocators = SpotAllocators()
+
+def init_spot_allocator(app):
+    """Applies the app's placement strategy to the shared allocators."""
+    app.config.setdefault('SPOT_ALLOCATION_STRATEGY', SPOT_ALLOCATION_STRATEGY)
+    allocators.configure(app.config['SPOT_ALLOCATION_STRATEGY'])
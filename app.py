@@ -2,6 +2,7 @@
 from flask import Flask, render_template, redirect, url_for, request, session, flash, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, current_user, login_required
+from werkzeug.serving import is_running_from_reloader
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta, date
 import json
@@ -11,10 +12,40 @@ import uuid
 # Import models
 from models.models import db, User, ParkingLot, ParkingSpot, Reservation, Payment, Transaction, SystemStats
 
+# Import database configuration shared with database_creator.py
+from config import configure_database, init_database
+
+# Import the per-request SQL query counter
+from query_counter import init_query_counter
+
+# Import request metrics collection
+from metrics import init_metrics
+
+# Import the password hashing pool
+from passwords import init_password_hasher
+
+# Import the per-lot spot allocators
+from allocator import init_spot_allocator
+
+# Import the background job queue and the jobs it runs: withdrawal settlement, the pending_payment
+# sweeper and history archival
+from jobs import init_jobs, jobs
+from settlement import init_settlement
+from sweeper import init_pending_payment_sweeper
+from archive import init_archive
+
+# Import the one-off rollup backfill for databases that predate the stats tables
+from stats import backfill_missing_stats
+
+# Import the lot search index, which older databases may not have yet
+from search import ensure_lot_search_index
+
 # Import controllers
 from controllers.auth_controller import init_auth_controller
 from controllers.admin_controller import init_admin_controller
 from controllers.user_controller import init_user_controller
+from controllers.stream_controller import init_stream_controller
+from controllers.metrics_controller import init_metrics_controller
 
 # Import utility functions from utils.py
 from utils import generate_spot_number, create_spots_for_lot, create_transaction
@@ -22,10 +53,16 @@ from utils import generate_spot_number, create_spots_for_lot, create_transaction
 # ---------------- Flask App Setup ----------------
 app = Flask(__name__)
 app.config['SECRET_KEY'] = "YOUR_SUPER_SECRET_KEY_HERE_CHANGE_THIS_IN_PRODUCTION_VERY_IMPORTANT"
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///parking.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-db.init_app(app)
+configure_database(app)
+init_database(app)
+init_query_counter(app)
+init_metrics(app)
+init_password_hasher(app)
+init_spot_allocator(app)
+init_jobs(app)
+init_settlement(app)
+init_pending_payment_sweeper(app)
+init_archive(app)
 
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -38,6 +75,9 @@ def load_user(user_id):
 
 with app.app_context():
     db.create_all()
+    ensure_lot_search_index()
+    backfill_missing_stats()
+    db.session.commit()
 
 # ---------------- Utility Functions (these are now in utils.py and imported above) ----------------
 # No utility functions here anymore, they are in utils.py
@@ -46,6 +86,11 @@ with app.app_context():
 init_auth_controller(app)
 init_admin_controller(app)
 init_user_controller(app)
+init_stream_controller(app)
+init_metrics_controller(app)
 
 if __name__ == '__main__':
+    # With debug=True this first process only watches files and restarts the server child, which runs the jobs
+    if not is_running_from_reloader():
+        jobs.enabled = False
     app.run(debug=True)
\ No newline at end of file
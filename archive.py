@@ -0,0 +1,140 @@
+# Parking App V1/archive.py
+from datetime import datetime, timedelta
+from flask import current_app
+from models.models import db, Reservation, Payment, Transaction
+from config import ARCHIVE_SCHEMA
+from jobs import jobs
+from metrics import register, Counter
+
+# Defaults, overridden by ARCHIVE_AFTER_DAYS / ARCHIVE_CHUNK_SIZE / ARCHIVE_INTERVAL in app.config
+ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_CHUNK_SIZE = 2000
+ARCHIVE_INTERVAL = 3600
+
+ARCHIVE_JOB = 'archive_history'
+
+ROWS_ARCHIVED = register(Counter(
+    'parking_archived_rows_total', "History rows moved into the archive database, by table.",
+    ('table',)))
+
+archive_metadata = db.MetaData()
+
+def archive_table(model, *indexes):
+    """Declares the archive copy of a model's table: same columns and ids, no foreign keys or defaults."""
+    columns = [db.Column(column.name, column.type, primary_key=column.primary_key)
+               for column in model.__table__.columns]
+    table = db.Table(model.__tablename__, archive_metadata, *columns, schema=ARCHIVE_SCHEMA)
+    for name, *column_names in indexes:
+        db.Index(name, *(table.c[column_name] for column_name in column_names))
+    return table
+
+# Indexed for the reads that still reach archived rows: wallet history and totals, and stats backfills
+ARCHIVE_TABLES = {
+    Reservation: archive_table(Reservation, ('ix_archive_reservations_user_end_time', 'user_id', 'end_time')),
+    Payment: archive_table(Payment, ('ix_archive_payments_completed_at', 'completed_at')),
+    Transaction: archive_table(Transaction, ('ix_archive_transactions_user_created_at', 'user_id', 'created_at')),
+}
+
+# Rows old enough and settled enough to leave the hot tables; pending work always stays behind
+ARCHIVE_RULES = {
+    Reservation: lambda cutoff: db.and_(Reservation.end_time < cutoff,
+                                        Reservation.status.in_(('completed', 'cancelled'))),
+    Payment: lambda cutoff: db.and_(Payment.completed_at < cutoff, Payment.payment_status == 'completed'),
+    Transaction: lambda cutoff: db.and_(Transaction.created_at < cutoff,
+                                        Transaction.status.in_(('completed', 'failed'))),
+}
+
+def create_archive_tables():
+    """Creates the archive tables in the attached archive database if they are missing."""
+    archive_metadata.create_all(db.engine)
+
+def not_yet_archived(model):
+    """Matches live rows with no archive copy, hiding rows caught between archive_batch's copy and delete."""
+    # Aliased because the archive table shares the live table's name
+    archived = ARCHIVE_TABLES[model].alias('archived')
+    return ~db.exists().where(archived.c.id == model.__table__.c.id)
+
+def with_archive(model, columns, criteria=None):
+    """Returns a UNION ALL of the named columns over the hot table and its archive copy, as a subquery.
+
+    criteria(c) builds the WHERE clause from a table's columns and is applied to each side, so both halves
+    can use their own indexes.
+    """
+    selects = []
+    for table in (model.__table__, ARCHIVE_TABLES[model]):
+        query = db.select(*(table.c[name] for name in columns))
+        if criteria is not None:
+            query = query.where(criteria(table.c))
+        if table is model.__table__:
+            query = query.where(not_yet_archived(model))
+        selects.append(query)
+    return db.union_all(*selects).subquery()
+
+def archive_batch(model, cutoff, after_id=0, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """Moves the next chunk of archivable rows with id > after_id in one short transaction.
+
+    Returns (rows moved, last id examined). The copy commits before the delete: a commit that spans the
+    attached archive is not atomic across the two files in WAL mode, so a crash may leave a row in both but
+    never in neither. Readers skip live rows that already have an archive copy, and the next run copies the
+    chunk again with INSERT OR IGNORE and finishes the delete.
+
+    The table's newest row always stays behind: SQLite gives a new row max(id) + 1, so moving the newest row
+    out would hand its id to the next insert and that row would collide with its archived namesake.
+    """
+    newest_id = db.select(db.func.max(model.id)).scalar_subquery()
+    ids = db.session.execute(
+        db.select(model.id)
+        .where(model.id > after_id, model.id < newest_id, ARCHIVE_RULES[model](cutoff))
+        .order_by(model.id)
+        .limit(chunk_size)
+    ).scalars().all()
+    if not ids:
+        return 0, after_id
+
+    hot = model.__table__
+    cold = ARCHIVE_TABLES[model]
+    column_names = [column.name for column in hot.columns]
+    try:
+        db.session.execute(
+            cold.insert().prefix_with('OR IGNORE').from_select(
+                column_names, db.select(*hot.columns).where(hot.c.id.in_(ids)))
+        )
+        db.session.commit()
+        db.session.execute(hot.delete().where(hot.c.id.in_(ids)))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    ROWS_ARCHIVED.inc((hot.name,), len(ids))
+    return len(ids), ids[-1]
+
+def archive_old_records(max_age_days=ARCHIVE_AFTER_DAYS, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """Moves settled history older than max_age_days into the archive and returns rows moved per table.
+
+    Each chunk commits on its own so the write lock is only held for one chunk at a time.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+    moved = {}
+    for model in ARCHIVE_TABLES:
+        after_id = 0
+        moved[model.__tablename__] = 0
+        while True:
+            count, after_id = archive_batch(model, cutoff, after_id, chunk_size)
+            moved[model.__tablename__] += count
+            if count < chunk_size:
+                break
+    return moved
+
+def run_archival():
+    """Job entry point: archives with the app's configured age and chunk size."""
+    return archive_old_records(current_app.config['ARCHIVE_AFTER_DAYS'], current_app.config['ARCHIVE_CHUNK_SIZE'])
+
+def init_archive(app):
+    """Creates the archive tables and schedules the archival job."""
+    app.config.setdefault('ARCHIVE_AFTER_DAYS', ARCHIVE_AFTER_DAYS)
+    app.config.setdefault('ARCHIVE_CHUNK_SIZE', ARCHIVE_CHUNK_SIZE)
+    app.config.setdefault('ARCHIVE_INTERVAL', ARCHIVE_INTERVAL)
+    with app.app_context():
+        create_archive_tables()
+    jobs.schedule(ARCHIVE_JOB, run_archival, app.config['ARCHIVE_INTERVAL'])
@@ -0,0 +1,47 @@
+# Parking App V1/benchmarks/__init__.py
+# Micro-benchmarks for the hot paths, run from the project directory as modules, e.g.
+#     python -m benchmarks.booking --bookers 60
+# Each one works on throwaway database files and prints a JSON report.
+import json
+import os
+import tempfile
+
+def throwaway_app():
+    """Imports app.py against empty database files in a temporary directory, with background jobs off."""
+    database_dir = tempfile.mkdtemp(prefix='parking-bench-')
+    os.environ['PARKING_DB_PATH'] = os.path.join(database_dir, 'parking.db')
+    os.environ['PARKING_ARCHIVE_DB_PATH'] = os.path.join(database_dir, 'parking_archive.db')
+
+    from app import app
+    from jobs import jobs
+    jobs.enabled = False
+    return app
+
+def make_lot(rows, cols, price=20.0, name='Bench Lot'):
+    """Creates a lot with a rows x cols grid of available spots. Call inside an app context."""
+    from models.models import db, ParkingLot
+    from utils import create_spots_for_lot
+
+    lot = ParkingLot(prime_location_name=name, address='1 Benchmark Road', pin_code='560001',
+                     price_per_hour=price, layout_rows=rows, layout_cols=cols,
+                     max_spots=rows * cols, max_parking_limit=max(100, rows * cols))
+    db.session.add(lot)
+    db.session.flush()
+    create_spots_for_lot(lot)
+    db.session.commit()
+    return lot
+
+def make_users(count, prefix='bench', balance=100000.0):
+    """Inserts plain users (no password hashing) and returns their ids. Call inside an app context."""
+    from models.models import db, User
+
+    db.session.execute(User.__table__.insert(), [
+        {'username': f'{prefix}{i}', 'email': f'{prefix}{i}@example.com', 'password': 'x',
+         'role': 'user', 'balance': balance}
+        for i in range(count)
+    ])
+    db.session.commit()
+    return [user_id for (user_id,) in db.session.query(User.id).filter(User.username.like(f'{prefix}%'))]
+
+def print_report(report):
+    print(json.dumps(report, indent=2))
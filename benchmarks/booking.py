@@ -0,0 +1,99 @@
+# Parking App V1/benchmarks/booking.py
+# Booking throughput under contention: many bookers race for a small lot, releasing each spot they win.
+#     python -m benchmarks.booking --bookers 60 --spots 40 --duration 10
+import argparse
+import threading
+import time
+from benchmarks import throwaway_app, make_lot, make_users, print_report
+
+def run(bookers, spots, duration):
+    app = throwaway_app()
+    from models.models import db, User, ParkingLot, Reservation
+    from booking import book_spot_for_user, LotFullError, ActiveReservationError
+    from checkout import bulk_checkout
+    from loadtest import percentile
+
+    with app.app_context():
+        lot_id = make_lot(1, spots).id
+        user_ids = make_users(bookers)
+
+    counts = {'booked': 0, 'full': 0, 'duplicate': 0, 'errors': 0, 'release_errors': 0}
+    errors = set()
+    latencies = []
+    lock = threading.Lock()
+    start = threading.Barrier(bookers)
+    stop_at = time.time() + duration
+
+    def record(outcome, error=None):
+        with lock:
+            counts[outcome] += 1
+            if error is not None:
+                errors.add(str(error).splitlines()[0][:200])
+
+    def booker(user_id):
+        with app.app_context():
+            start.wait()
+            while time.time() < stop_at:
+                started_at = time.perf_counter()
+                reservation = None
+                try:
+                    reservation = book_spot_for_user(db.session.get(User, user_id), db.session.get(ParkingLot, lot_id))
+                    record('booked')
+                except LotFullError:
+                    record('full')
+                except ActiveReservationError:
+                    record('duplicate')
+                except Exception as e:
+                    record('errors', e)
+                with lock:
+                    latencies.append(time.perf_counter() - started_at)
+
+                if reservation is not None:
+                    try:
+                        bulk_checkout(reservation_ids=[reservation.id])
+                    except Exception as e:
+                        record('release_errors', e)
+                db.session.remove()
+
+    threads = [threading.Thread(target=booker, args=(user_id,)) for user_id in user_ids]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        # Every booker shares one lot, so two open reservations on a spot would show up here
+        double_allocated = db.session.query(Reservation.spot_id).filter(
+            Reservation.end_time.is_(None)
+        ).group_by(Reservation.spot_id).having(db.func.count() > 1).count()
+        lot = db.session.get(ParkingLot, lot_id)
+        counter, recount = lot.occupied_spots, lot.refresh_occupancy()
+
+    attempts = counts['booked'] + counts['full'] + counts['duplicate'] + counts['errors']
+    latencies.sort()
+    return {
+        'bookers': bookers,
+        'spots': spots,
+        'duration_s': round(elapsed, 2),
+        'attempts': attempts,
+        **counts,
+        'attempts_per_s': round(attempts / elapsed, 1),
+        'bookings_per_s': round(counts['booked'] / elapsed, 1),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'double_allocated_spots': double_allocated,
+        'occupied_counter': counter,
+        'occupied_recount': recount,
+        'error_messages': sorted(errors),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure booking throughput with many concurrent bookers.")
+    parser.add_argument('--bookers', type=int, default=60)
+    parser.add_argument('--spots', type=int, default=40)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+    print_report(run(args.bookers, args.spots, args.duration))
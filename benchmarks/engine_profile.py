@@ -0,0 +1,107 @@
+# Parking App V1/benchmarks/engine_profile.py
+# Mixed read/write throughput with the shared SQLite engine profile (WAL, busy_timeout, synchronous=NORMAL)
+# against the plain rollback journal used before it. Each profile runs in its own process.
+#     python -m benchmarks.engine_profile --writers 16 --readers 16 --duration 5
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from benchmarks import print_report
+
+PROFILES = ('rollback', 'wal')
+
+def run_profile(profile, writers, readers, duration):
+    import config
+    if profile == 'rollback':
+        # Must happen before app.py calls configure_database(), which copies the defaults
+        config.SQLITE_PRAGMAS.clear()
+
+    from benchmarks import throwaway_app, make_lot, make_users
+    app = throwaway_app()
+    from models.models import db, User, ParkingLot
+    from booking import book_spot_for_user
+    from checkout import bulk_checkout
+    from utils import build_spot_grids
+
+    with app.app_context():
+        journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+        lot_id = make_lot(10, 20).id
+        user_ids = make_users(writers)
+
+    counts = {'writes': 0, 'reads': 0, 'write_errors': 0, 'read_errors': 0}
+    errors = set()
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def record(outcome, error=None):
+        with lock:
+            counts[outcome] += 1
+            if error is not None:
+                errors.add(str(error).splitlines()[0][:200])
+
+    def writer(user_id):
+        with app.app_context():
+            while time.time() < stop_at:
+                try:
+                    reservation = book_spot_for_user(db.session.get(User, user_id), db.session.get(ParkingLot, lot_id))
+                    bulk_checkout(reservation_ids=[reservation.id])
+                    record('writes')
+                except Exception as e:
+                    db.session.rollback()
+                    record('write_errors', e)
+                db.session.remove()
+
+    def reader():
+        with app.app_context():
+            while time.time() < stop_at:
+                try:
+                    build_spot_grids(ParkingLot.query.all())
+                    record('reads')
+                except Exception as e:
+                    record('read_errors', e)
+                db.session.remove()
+
+    threads = ([threading.Thread(target=writer, args=(user_id,)) for user_id in user_ids]
+               + [threading.Thread(target=reader) for _ in range(readers)])
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'profile': profile,
+        'journal_mode': journal_mode,
+        'writers': writers,
+        'readers': readers,
+        'duration_s': round(elapsed, 2),
+        **counts,
+        'writes_per_s': round(counts['writes'] / elapsed, 1),
+        'reads_per_s': round(counts['reads'] / elapsed, 1),
+        'error_messages': sorted(errors),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare mixed read/write throughput across SQLite engine profiles.")
+    parser.add_argument('--writers', type=int, default=16)
+    parser.add_argument('--readers', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--profile', choices=PROFILES, help="Run one profile in this process")
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args.profile, args.writers, args.readers, args.duration)))
+    else:
+        # A fresh process per profile, since the engine profile is fixed once app.py is imported
+        reports = []
+        for profile in PROFILES:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.engine_profile', '--profile', profile,
+                 '--writers', str(args.writers), '--readers', str(args.readers), '--duration', str(args.duration)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            reports.append(json.loads(output.strip().splitlines()[-1]))
+        print_report(reports)
@@ -0,0 +1,70 @@
+# Parking App V1/benchmarks/spot_provisioning.py
+# Lot creation cost: one ORM ParkingSpot per cell versus the batched core inserts behind create_spots_for_lot.
+#     python -m benchmarks.spot_provisioning --sizes 100 1000 10000 50000
+import argparse
+import time
+import tracemalloc
+from benchmarks import throwaway_app, print_report
+
+# Grid shapes used for each benchmarked spot count; other counts use a single row
+LAYOUTS = {100: (10, 10), 1000: (25, 40), 10000: (25, 400), 50000: (25, 2000)}
+
+def orm_spots(lot):
+    """The per-object path create_spots_for_lot replaced, kept here as the baseline."""
+    from models.models import db, ParkingSpot
+    from utils import generate_spot_number
+
+    for row in range(lot.layout_rows):
+        for col in range(lot.layout_cols):
+            db.session.add(ParkingSpot(lot_id=lot.id, spot_number=generate_spot_number(row, col),
+                                       row_position=row, col_position=col, status='A'))
+
+def provision(provisioner, rows, cols):
+    """Creates a lot and its spots in one transaction and returns the seconds taken."""
+    from models.models import db, ParkingLot
+
+    started_at = time.perf_counter()
+    lot = ParkingLot(prime_location_name='Bench Lot', address='1 Benchmark Road', pin_code='560001',
+                     price_per_hour=20.0, layout_rows=rows, layout_cols=cols,
+                     max_spots=rows * cols, max_parking_limit=rows * cols)
+    db.session.add(lot)
+    db.session.flush()
+    provisioner(lot)
+    db.session.commit()
+    elapsed = time.perf_counter() - started_at
+    db.session.expunge_all()
+    return elapsed
+
+def peak_memory(provisioner, rows, cols):
+    """Peak Python heap in MiB while provisioning, measured on a separate run since tracing slows it down."""
+    tracemalloc.start()
+    provision(provisioner, rows, cols)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+def run(sizes):
+    app = throwaway_app()
+    from utils import create_spots_for_lot
+
+    results = []
+    with app.app_context():
+        for size in sizes:
+            rows, cols = LAYOUTS.get(size, (1, size))
+            orm_seconds = provision(orm_spots, rows, cols)
+            bulk_seconds = provision(create_spots_for_lot, rows, cols)
+            results.append({
+                'spots': rows * cols,
+                'orm_ms': round(orm_seconds * 1000, 1),
+                'bulk_ms': round(bulk_seconds * 1000, 1),
+                'speedup': round(orm_seconds / bulk_seconds, 1),
+                'orm_peak_mib': round(peak_memory(orm_spots, rows, cols), 1),
+                'bulk_peak_mib': round(peak_memory(create_spots_for_lot, rows, cols), 1),
+            })
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare per-object and batched spot provisioning.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=sorted(LAYOUTS))
+    args = parser.parse_args()
+    print_report(run(args.sizes))
@@ -0,0 +1,82 @@
+# Parking App V1/booking.py
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from models.models import db, ParkingLot, ParkingSpot, Reservation
+from stats import record_reservation
+from allocator import allocators
+
+# How many candidate spots to try before giving up when other bookers keep winning the race
+MAX_CLAIM_ATTEMPTS = 5
+
+class LotFullError(Exception):
+    """Raised when a lot has no spot left to claim."""
+
+class ActiveReservationError(Exception):
+    """Raised when the user already holds an active reservation."""
+
+def take_spot(lot_id, spot_id):
+    """Flips the spot to occupied if it is still available and bumps the lot's counter; False if someone beat us."""
+    # Only one concurrent booker can match status='A' for this row; the others see rowcount 0 and move on
+    result = db.session.execute(
+        db.update(ParkingSpot)
+        .where(ParkingSpot.id == spot_id, ParkingSpot.status == 'A')
+        .values(status='O')
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    db.session.execute(
+        db.update(ParkingLot)
+        .where(ParkingLot.id == lot_id)
+        .values(occupied_spots=ParkingLot.occupied_spots + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return True
+
+def claim_spot(lot, attempts=MAX_CLAIM_ATTEMPTS):
+    """Atomically occupies the lot's best free spot under the configured strategy and returns its id, or None if full."""
+    allocator = allocators.get(lot)
+    for resync in (False, True):
+        if resync:
+            # Spots freed by another process never reach this bitmap, so reread the lot before calling it full
+            allocator = allocators.load(lot)
+        for _ in range(attempts):
+            candidate_id = allocator.acquire()
+            if candidate_id is None:
+                break
+            if take_spot(lot.id, candidate_id):
+                return candidate_id
+            # Taken by another process or under maintenance: its bit stays cleared until the lot is reloaded
+    return None
+
+def book_spot_for_user(user, lot):
+    """Claims a spot in the lot and opens a reservation for the user in one transaction."""
+    spot_id = None
+    try:
+        spot_id = claim_spot(lot)
+        if spot_id is None:
+            raise LotFullError()
+
+        reservation = Reservation(
+            user_id=user.id,
+            spot_id=spot_id,
+            start_time=datetime.utcnow(),
+            vehicle_number=user.vehicle_number,
+            status='active'
+        )
+        db.session.add(reservation)
+        # uq_reservations_user_active rejects a second open reservation for the same user
+        db.session.flush()
+        record_reservation(reservation, lot.id)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        allocators.release(lot.id, spot_id)
+        raise ActiveReservationError()
+    except Exception:
+        db.session.rollback()
+        # The rollback put the spot back to 'A', so hand it back to the bitmap too
+        allocators.release(lot.id, spot_id)
+        raise
+
+    return reservation
@@ -0,0 +1,179 @@
+# Parking App V1/checkout.py
+from datetime import datetime
+from sqlalchemy.orm import joinedload
+from models.models import db, ParkingLot, ParkingSpot, Reservation, Payment, Transaction
+from utils import generate_reference_id, debit_balance
+from stats import bump_daily_stats, bump_hourly_stats, record_checkout
+from allocator import allocators
+from events import publish_lot_update
+
+# Most reservation ids one bulk checkout call accepts
+BULK_CHECKOUT_LIMIT = 1000
+
+def close_reservations(reservation_ids, ended_at):
+    """Stamps end_time on the reservations that are still open and returns their ids.
+
+    Concurrent releases of the same reservation cannot both see it open, so a stay is never charged twice.
+    """
+    if not reservation_ids:
+        return set()
+    result = db.session.execute(
+        db.update(Reservation)
+        .where(Reservation.id.in_(reservation_ids), Reservation.end_time.is_(None))
+        .values(end_time=ended_at)
+        .returning(Reservation.id)
+        .execution_options(synchronize_session=False)
+    )
+    return {reservation_id for (reservation_id,) in result}
+
+def checkout_reservation(reservation, ended_at):
+    """Prices a closed stay, frees its spot and debits the wallet when the balance covers it.
+
+    Returns the (payment, transaction) rows to write with insert_checkout_records, or None when the
+    reservation was left pending_payment. The caller also updates occupancy with release_occupancy,
+    records stats and commits.
+    """
+    spot = reservation.spot
+    lot = spot.lot
+
+    reservation.end_time = ended_at
+    cost = round(reservation.duration_hours() * lot.price_per_hour, 2)
+    reservation.cost = cost
+    spot.status = 'A'
+
+    if not debit_balance(reservation.user_id, cost):
+        reservation.status = 'pending_payment'
+        return None
+
+    reservation.status = 'completed'
+    return payment_records(reservation.user_id, reservation.id, cost, ended_at, lot.prime_location_name)
+
+def payment_records(user_id, reservation_id, amount, paid_at, lot_name):
+    """Builds the wallet payment and debit rows for one settled reservation."""
+    payment = {
+        'user_id': user_id,
+        'reservation_id': reservation_id,
+        'amount': amount,
+        'payment_date': paid_at,
+        'payment_method': 'wallet',
+        'payment_status': 'completed',
+        'completed_at': paid_at
+    }
+    transaction = {
+        'user_id': user_id,
+        'amount': amount,
+        'type': 'debit',
+        'created_at': paid_at,
+        'description': f"Payment for reservation {reservation_id} at {lot_name}",
+        'reference_id': generate_reference_id('debit'),
+        'payment_method': 'wallet',
+        'status': 'completed'
+    }
+    return payment, transaction
+
+def insert_checkout_records(records):
+    """Writes the payment and debit rows of one or many checkouts with one executemany each. Caller commits."""
+    if records:
+        db.session.execute(Payment.__table__.insert(), [payment for payment, _ in records])
+        db.session.execute(Transaction.__table__.insert(), [transaction for _, transaction in records])
+
+def release_occupancy(released_by_lot):
+    """Takes the freed spots off each lot's occupied_spots counter. Caller commits."""
+    for lot_id, released in released_by_lot.items():
+        db.session.execute(
+            db.update(ParkingLot)
+            .where(ParkingLot.id == lot_id)
+            .values(occupied_spots=ParkingLot.occupied_spots - released)
+            .execution_options(synchronize_session=False)
+        )
+
+def bulk_checkout(reservation_ids=None, lot_id=None):
+    """Releases many open reservations with the same pricing as a single release.
+
+    Takes either a list of at most BULK_CHECKOUT_LIMIT reservation ids, released in one transaction, or a lot
+    id. A lot is released in id order, BULK_CHECKOUT_LIMIT reservations per transaction, so a large event lot
+    never holds the write lock for the whole walk. Returns one result dict per requested or matched reservation.
+    """
+    ended_at = datetime.utcnow()
+
+    if lot_id is None:
+        if len(reservation_ids) > BULK_CHECKOUT_LIMIT:
+            raise ValueError(f"At most {BULK_CHECKOUT_LIMIT} reservations can be checked out at once")
+        return checkout_batch(reservation_ids, ended_at)
+
+    open_in_lot = db.session.query(Reservation.id).join(
+        ParkingSpot, Reservation.spot_id == ParkingSpot.id
+    ).filter(
+        ParkingSpot.lot_id == lot_id,
+        Reservation.end_time.is_(None)
+    )
+    # Cars that park after the call starts are not swept up by it
+    last_id = open_in_lot.with_entities(db.func.max(Reservation.id)).scalar()
+    if last_id is None:
+        return []
+
+    results = []
+    after_id = 0
+    while True:
+        batch = [reservation_id for (reservation_id,) in open_in_lot.filter(
+            Reservation.id > after_id, Reservation.id <= last_id
+        ).order_by(Reservation.id).limit(BULK_CHECKOUT_LIMIT)]
+        if not batch:
+            return results
+        results.extend(checkout_batch(batch, ended_at))
+        after_id = batch[-1]
+
+def checkout_batch(reservation_ids, ended_at):
+    """Releases one batch of reservations in a single transaction, then refreshes caches and publishes occupancy."""
+    results = {reservation_id: {'reservation_id': reservation_id, 'status': 'not_found'}
+               for reservation_id in reservation_ids}
+    try:
+        closed_ids = close_reservations(list(results), ended_at)
+
+        reservations = Reservation.query.options(
+            joinedload(Reservation.spot).joinedload(ParkingSpot.lot)
+        ).filter(Reservation.id.in_(list(results))).all()
+
+        released_by_lot = {}
+        hourly = {}
+        records = []
+        for reservation in reservations:
+            result = results[reservation.id]
+            result.update(user_id=reservation.user_id, spot_id=reservation.spot_id, lot_id=reservation.spot.lot_id)
+            if reservation.id not in closed_ids:
+                result['status'] = 'already_closed'
+                continue
+
+            record = checkout_reservation(reservation, ended_at)
+            result.update(status=reservation.status, cost=reservation.cost,
+                          duration_hours=round(reservation.duration_hours(), 2))
+            released_by_lot[reservation.spot.lot_id] = released_by_lot.get(reservation.spot.lot_id, 0) + 1
+            record_checkout(hourly, reservation.spot.lot_id, reservation, paid=record is not None)
+            if record is not None:
+                records.append(record)
+
+        insert_checkout_records(records)
+        release_occupancy(released_by_lot)
+        bump_hourly_stats(hourly)
+        revenue = sum(payment['amount'] for payment, _ in records)
+        # One stats upsert for the whole batch instead of one per payment
+        if revenue:
+            bump_daily_stats(ended_at.date(), revenue=revenue)
+
+        released = [result for result in results.values() if result['status'] in ('completed', 'pending_payment')]
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Reload the touched lots and spots in two queries instead of one lazy refresh per object
+    spot_ids = [result['spot_id'] for result in released]
+    spots_by_lot = {}
+    for spot in ParkingSpot.query.filter(ParkingSpot.id.in_(spot_ids)):
+        spots_by_lot.setdefault(spot.lot_id, []).append(spot)
+    for lot in ParkingLot.query.filter(ParkingLot.id.in_(list(spots_by_lot))):
+        for spot in spots_by_lot[lot.id]:
+            allocators.release(lot.id, spot.id)
+        publish_lot_update(lot, spots_by_lot[lot.id])
+
+    return list(results.values())
@@ -0,0 +1,68 @@
+# Parking App V1/config.py
+import os
+from sqlalchemy import event
+from models.models import db
+
+DATABASE_FILENAME = 'parking.db'
+
+# Completed history moved out by archive.py, attached to every connection under this schema name
+ARCHIVE_DATABASE_FILENAME = 'parking_archive.db'
+ARCHIVE_SCHEMA = 'archive'
+
+# PRAGMAs applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',      # Dashboard reads no longer wait on booking writes
+    'busy_timeout': 5000,       # Milliseconds to wait for a write lock before "database is locked"
+    'synchronous': 'NORMAL',    # Durable under WAL, fsyncs at checkpoints instead of every commit
+    'cache_size': -20000,       # Negative means KiB, so roughly 20 MB of page cache per connection
+    'mmap_size': 268435456,     # Serve reads from a 256 MB memory map
+}
+
+# Connection pool sized for a threaded server; each worker thread holds at most one connection
+ENGINE_OPTIONS = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+    'connect_args': {'check_same_thread': False, 'timeout': 5},
+}
+
+def database_path(app):
+    """Returns the SQLite file shared by app.py and database_creator.py (override with PARKING_DB_PATH)."""
+    return os.environ.get('PARKING_DB_PATH') or os.path.join(app.instance_path, DATABASE_FILENAME)
+
+def archive_database_path(app):
+    """Returns the SQLite file that holds archived history (override with PARKING_ARCHIVE_DB_PATH)."""
+    return os.environ.get('PARKING_ARCHIVE_DB_PATH') or os.path.join(app.instance_path, ARCHIVE_DATABASE_FILENAME)
+
+def configure_database(app):
+    """Points the app at the shared database file and fills in the engine profile defaults."""
+    os.makedirs(app.instance_path, exist_ok=True)
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', f'sqlite:///{database_path(app)}')
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', dict(ENGINE_OPTIONS))
+    app.config.setdefault('SQLITE_PRAGMAS', dict(SQLITE_PRAGMAS))
+    app.config.setdefault('ARCHIVE_DATABASE_PATH', archive_database_path(app))
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+def init_database(app):
+    """Initializes db with the app; every pooled connection gets SQLITE_PRAGMAS and the attached archive."""
+    db.init_app(app)
+
+    pragmas = app.config.get('SQLITE_PRAGMAS', {})
+    archive_path = app.config.get('ARCHIVE_DATABASE_PATH')
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite' or not (pragmas or archive_path):
+        return
+
+    @event.listens_for(engine, 'connect')
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        if archive_path:
+            cursor.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (archive_path,))
+            # journal_mode and synchronous are per database file, so the archive needs its own
+            for name in ('journal_mode', 'synchronous'):
+                if name in pragmas:
+                    cursor.execute(f"PRAGMA {ARCHIVE_SCHEMA}.{name}={pragmas[name]}")
+        cursor.close()
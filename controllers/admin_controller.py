@@ -1,9 +1,55 @@
 # Parking App V1/controllers/admin_controller.py
-from flask import render_template, redirect, url_for, request, flash, jsonify
+import hashlib
+import json
+from flask import render_template, redirect, url_for, request, flash, jsonify, abort, Response, stream_with_context
 from flask_login import current_user, login_required
 from datetime import datetime, timedelta, date
 from models.models import db, User, ParkingLot, ParkingSpot, Reservation, Payment, Transaction, SystemStats
-from utils import generate_spot_number, create_spots_for_lot # Changed import path
+from utils import create_spots_for_lot, insert_spots, build_spot_grids # Changed import path
+from stats import daily_booking_stats, peak_hours, lot_breakdown
+from events import publish_layout_change, lot_versions
+from cache import LRUCache
+from allocator import allocators
+from fragments import lot_card_cache
+from checkout import bulk_checkout
+from exports import stream_export, EXPORT_FORMATS
+
+# Seconds a serialized layout may live; bounds staleness from spot changes made by other processes
+LAYOUT_CACHE_TTL = 10
+
+# (etag, body) of serialized lot layouts keyed by layout_cache_key; stale keys simply age out
+layout_cache = LRUCache(maxsize=256, ttl=LAYOUT_CACHE_TTL)
+
+def layout_cache_key(lot_id, occupied_spots):
+    """Changes whenever the layout could: local changes bump the version, and the occupied count read from
+    the database catches bookings and releases made by other processes."""
+    return (lot_id, lot_versions.get(lot_id), occupied_spots)
+
+def parse_date(value):
+    """Parses a YYYY-MM-DD query argument; returns None when it is missing or malformed."""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+def export_date_arg(args, name):
+    """Parses an optional YYYY-MM-DD export filter; raises ValueError naming the argument when it is malformed."""
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a date in YYYY-MM-DD format") from None
+
+def export_lot_arg(args):
+    """Parses the optional lot_id export filter; raises ValueError when it is not a positive integer."""
+    value = args.get('lot_id')
+    if not value:
+        return None
+    if not (value.isascii() and value.isdigit()):
+        raise ValueError("lot_id must be an integer")
+    return int(value)
 
 def init_admin_controller(app):
     """Initializes admin routes with the Flask app."""
@@ -17,38 +63,19 @@ def init_admin_controller(app):
 
         lots = ParkingLot.query.all()
         users = User.query.filter_by(role='user').all()
-        total_revenue = db.session.query(db.func.sum(Payment.amount)).filter_by(payment_status='completed').scalar() or 0
-        total_bookings = Reservation.query.count()
+        # The daily rollups cover archived history too, and summing them avoids scanning payments and reservations
+        total_revenue, total_bookings = db.session.query(
+            db.func.coalesce(db.func.sum(SystemStats.total_revenue), 0),
+            db.func.coalesce(db.func.sum(SystemStats.total_reservations), 0)
+        ).one()
+        
+        spot_grids = build_spot_grids(lots)
         
         lot_details = []
         for lot in lots:
-            spots = ParkingSpot.query.filter_by(lot_id=lot.id).order_by(ParkingSpot.row_position, ParkingSpot.col_position).all()
-            
-            spot_grid = []
-            for row in range(lot.layout_rows):
-                row_spots = []
-                for col in range(lot.layout_cols):
-                    spot = next((s for s in spots if s.row_position == row and s.col_position == col), None)
-                    if spot:
-                        reservation = spot.current_reservation()
-                        user_booked = User.query.get(reservation.user_id) if reservation else None
-                        row_spots.append({
-                            'spot': spot,
-                            'occupied_by': user_booked.username if user_booked else None,
-                            'start_by_id': user_booked.id if user_booked else None,
-                            'start_time': reservation.start_time.strftime('%H:%M, %d %b %Y') if reservation else None,
-                            'duration': f"{reservation.duration_hours():.1f}h" if reservation else None,
-                            'vehicle_number': user_booked.vehicle_number if user_booked else None,
-                            'vehicle_type': user_booked.vehicle_type if user_booked else None,
-                            'reservation_id': reservation.id if reservation else None
-                        })
-                    else:
-                        row_spots.append(None)
-                spot_grid.append(row_spots)
-            
             lot_details.append({
                 'lot': lot,
-                'spot_grid': spot_grid,
+                'spot_grid': spot_grids[lot.id],
                 'occupancy_rate': lot.occupancy_rate(),
                 'available_spots': lot.available_spots_count()
             })
@@ -66,32 +93,34 @@ def init_admin_controller(app):
             flash("Unauthorized access!", "danger")
             return redirect(url_for('home'))
         
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=30)
-        
-        daily_revenue = db.session.query(
-            db.func.date(Payment.completed_at).label('date'),
-            db.func.sum(Payment.amount).label('revenue')
-        ).filter(
-            Payment.payment_status == 'completed',
-            Payment.completed_at >= start_date
-        ).group_by(db.func.date(Payment.completed_at)).all()
+        # Buckets are keyed by UTC date like the reservation timestamps; the default range is the last 30 days
+        end_date = parse_date(request.args.get('end')) or datetime.utcnow().date()
+        start_date = parse_date(request.args.get('start')) or end_date - timedelta(days=30)
+        if start_date > end_date:
+            start_date, end_date = end_date, start_date
+        lot_id = request.args.get('lot_id', type=int)
         
-        peak_hours = db.session.query(
-            db.func.strftime('%H', Reservation.start_time).label('hour'),
-            db.func.count(Reservation.id).label('bookings')
-        ).group_by(db.func.strftime('%H', Reservation.start_time)).all()
+        # Every chart is a range scan over the hourly buckets, so cost scales with the range shown, not rows stored
+        daily = daily_booking_stats(start_date, end_date, lot_id)
+        peak = peak_hours(start_date, end_date, lot_id)
+        lot_stats = lot_breakdown(start_date, end_date)
         
+        lots = ParkingLot.query.order_by(ParkingLot.prime_location_name).all()
         lot_occupancy = []
-        for lot in ParkingLot.query.all():
+        for lot in lots:
             lot_occupancy.append({
                 'name': lot.prime_location_name,
                 'occupancy': lot.occupancy_rate()
             })
         
         return render_template('admin_analytics.html',
-                               daily_revenue=daily_revenue,
-                               peak_hours=peak_hours,
+                               start_date=start_date,
+                               end_date=end_date,
+                               lot_id=lot_id,
+                               lots=lots,
+                               daily=daily,
+                               peak_hours=peak,
+                               lot_stats=lot_stats,
                                lot_occupancy=lot_occupancy)
 
     @app.route('/admin/create_lot', methods=['POST'])
@@ -139,10 +168,12 @@ def init_admin_controller(app):
             )
             
             db.session.add(new_lot)
-            db.session.commit()
+            db.session.flush()
 
+            # Lot and spots go in together so a failure never leaves a lot without its spots
             create_spots_for_lot(new_lot)
             db.session.commit()
+            publish_layout_change(new_lot.id)
             
             flash(f"Parking lot '{name}' created successfully with {calculated_max_spots} spots (Max limit: {max_parking_limit})!", "success")
 
@@ -167,13 +198,15 @@ def init_admin_controller(app):
             flash("Parking lot not found!", "danger")
             return redirect(url_for('admin_dashboard'))
 
-        if any(spot.status == 'O' for spot in lot.parking_spots):
+        if lot.refresh_occupancy() > 0:
             flash("Cannot delete a lot with occupied spots!", "danger")
             return redirect(url_for('admin_dashboard'))
 
         try:
             db.session.delete(lot)
             db.session.commit()
+            allocators.reset(lot_id)
+            publish_layout_change(lot_id)
             flash("Parking lot and its spots deleted successfully!", "success")
         except Exception as e:
             db.session.rollback()
@@ -214,22 +247,10 @@ def init_admin_controller(app):
                 flash(f"Cannot set {new_max_spots} spots as it exceeds maximum parking limit ({new_max_parking_limit})!", "danger")
                 return redirect(url_for('admin_dashboard'))
             
-            current_spots_count = len(lot.parking_spots)
+            current_spots_count = ParkingSpot.query.filter_by(lot_id=lot.id).count()
             
             if new_max_spots > current_spots_count:
-                for i in range(current_spots_count, new_max_spots):
-                    row = i // new_layout_cols
-                    col = i % new_layout_cols
-                    spot_number = generate_spot_number(row, col)
-                    
-                    new_spot = ParkingSpot(
-                        lot_id=lot.id,
-                        spot_number=spot_number,
-                        row_position=row,
-                        col_position=col,
-                        status='A'
-                    )
-                    db.session.add(new_spot)
+                insert_spots(lot.id, ((i // new_layout_cols, i % new_layout_cols) for i in range(current_spots_count, new_max_spots)))
             elif new_max_spots < current_spots_count:
                 spots_to_remove = ParkingSpot.query.filter_by(lot_id=lot.id).order_by(ParkingSpot.id.desc()).limit(current_spots_count - new_max_spots).all()
                 for spot in spots_to_remove:
@@ -242,8 +263,12 @@ def init_admin_controller(app):
             lot.layout_cols = new_layout_cols
             lot.max_spots = new_max_spots
             lot.max_parking_limit = new_max_parking_limit
+            db.session.flush()
+            lot.refresh_occupancy()
             
             db.session.commit()
+            allocators.reset(lot.id)
+            publish_layout_change(lot.id)
             flash(f"Parking lot updated successfully! Current: {new_max_spots} spots, Max limit: {new_max_parking_limit}", "success")
             
         except ValueError:
@@ -255,27 +280,123 @@ def init_admin_controller(app):
         
         return redirect(url_for('admin_dashboard'))
 
+    @app.route('/api/admin/bulk_checkout', methods=['POST'])
+    @login_required
+    def bulk_checkout_api():
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        payload = request.get_json(silent=True) or {}
+        reservation_ids = payload.get('reservation_ids')
+        lot_id = payload.get('lot_id')
+        if (reservation_ids is None) == (lot_id is None):
+            return jsonify({'error': 'Provide either reservation_ids or lot_id'}), 400
+        # bool is a subclass of int, so compare types exactly; a string of digits must not pass as a list of ids
+        if reservation_ids is not None and not (
+                isinstance(reservation_ids, list) and all(type(i) is int for i in reservation_ids)):
+            return jsonify({'error': 'reservation_ids must be a list of integers'}), 400
+        if lot_id is not None and type(lot_id) is not int:
+            return jsonify({'error': 'lot_id must be an integer'}), 400
+
+        try:
+            if lot_id is not None:
+                results = bulk_checkout(lot_id=lot_id)
+            else:
+                results = bulk_checkout(reservation_ids=list(dict.fromkeys(reservation_ids)))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': f"Bulk checkout failed: {str(e)}"}), 500
+
+        completed = [r for r in results if r['status'] == 'completed']
+        pending = [r for r in results if r['status'] == 'pending_payment']
+        return jsonify({
+            'released': len(completed) + len(pending),
+            'completed': len(completed),
+            'pending_payment': len(pending),
+            'pending_payment_ids': [r['reservation_id'] for r in pending],
+            'revenue': round(sum(r['cost'] for r in completed), 2),
+            'results': results
+        })
+
+    @app.route('/api/admin/export/<kind>')
+    @login_required
+    def export_api(kind):
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        fmt = request.args.get('format', 'csv')
+        try:
+            # A filter that is silently dropped would export the whole table, so malformed ones are rejected
+            start_date = export_date_arg(request.args, 'start')
+            end_date = export_date_arg(request.args, 'end')
+            lot_id = export_lot_arg(request.args)
+            chunks = stream_export(kind, fmt, start_date, end_date, lot_id)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Rows are read and written a chunk at a time while the response is being sent
+        filename = '-'.join([kind] + [d.isoformat() for d in (start_date, end_date) if d]) + f'.{fmt}'
+        return Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt], headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no'
+        })
+
+    @app.route('/api/admin/cache_stats')
+    @login_required
+    def cache_stats_api():
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        return jsonify({
+            'layout': layout_cache.stats(),
+            'lot_cards': lot_card_cache.stats()
+        })
+
     @app.route('/api/lot/<int:lot_id>/layout')
     def get_lot_layout(lot_id):
-        lot = ParkingLot.query.get_or_404(lot_id)
-        spots = ParkingSpot.query.filter_by(lot_id=lot_id).all()
-        
-        layout = []
-        for row in range(lot.layout_rows):
-            row_spots = []
-            for col in range(lot.layout_cols):
-                spot = next((s for s in spots if s.row_position == row and s.col_position == col), None)
-                if spot:
-                    row_spots.append({
-                        'id': spot.id,
-                        'number': spot.spot_number,
-                        'status': spot.status
-                    })
-                else:
-                    row_spots.append(None)
-            layout.append(row_spots)
+        # One primary-key lookup keys the cache, so an unchanged layout costs no grid rebuild or spot query
+        occupied_spots = db.session.query(ParkingLot.occupied_spots).filter_by(id=lot_id).scalar()
+        if occupied_spots is None:
+            abort(404)
+
+        key = layout_cache_key(lot_id, occupied_spots)
+        cached = layout_cache.get(key)
+        if cached is None:
+            lot = ParkingLot.query.get_or_404(lot_id)
+            spots = ParkingSpot.query.filter_by(lot_id=lot_id).all()
+            spots_by_cell = {(spot.row_position, spot.col_position): spot for spot in spots}
+            
+            layout = []
+            for row in range(lot.layout_rows):
+                row_spots = []
+                for col in range(lot.layout_cols):
+                    spot = spots_by_cell.get((row, col))
+                    if spot:
+                        row_spots.append({
+                            'id': spot.id,
+                            'number': spot.spot_number,
+                            'status': spot.status
+                        })
+                    else:
+                        row_spots.append(None)
+                layout.append(row_spots)
+            
+            body = json.dumps({
+                'layout': layout,
+                'occupancy_rate': lot.occupancy_rate()
+            })
+            # Derived from the body itself, so a 304 can never confirm a layout that has since changed
+            etag = f"lot-{lot_id}-{hashlib.sha1(body.encode()).hexdigest()[:16]}"
+            cached = (etag, body)
+            layout_cache.set(key, cached)
         
-        return jsonify({
-            'layout': layout,
-            'occupancy_rate': lot.occupancy_rate()
-        })
\ No newline at end of file
+        etag, body = cached
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        # Clients may keep the body but must revalidate before reusing it
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
@@ -1,7 +1,8 @@
 # Parking App V1/controllers/auth_controller.py
-from flask import render_template, redirect, url_for, request, flash
+from flask import render_template, redirect, url_for, request, flash, after_this_request
 from flask_login import login_user, logout_user, current_user, login_required
 from models.models import db, User # Import db and User from models
+from passwords import hasher
 
 def init_auth_controller(app):
     """Initializes authentication routes with the Flask app."""
@@ -27,8 +28,23 @@ def init_auth_controller(app):
             remember = True if request.form.get('remember') else False
 
             user = User.query.filter_by(username=username).first()
+            password_ok = False
+
+            if user:
+                password_ok, queue_ms = hasher.verify(user.password, password)
+                app.logger.info("Password check for %s waited %.1f ms for a hashing worker", username, queue_ms)
+
+                @after_this_request
+                def report_hash_queue_time(response):
+                    response.headers['X-Password-Queue-Ms'] = f"{queue_ms:.1f}"
+                    return response
+
+            if password_ok:
+                # Upgrade hashes made with an older method or cost while the plaintext is at hand
+                if hasher.needs_rehash(user.password):
+                    user.set_password(password)
+                    db.session.commit()
 
-            if user and user.check_password(password):
                 login_user(user, remember=remember)
                 flash(f"Welcome back, {user.username}!", "success")
                 if user.role == 'user':
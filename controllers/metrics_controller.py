@@ -0,0 +1,49 @@
+# Parking App V1/controllers/metrics_controller.py
+from flask import Response
+from models.models import db, ParkingLot, Reservation
+from metrics import Gauge, register, render_metrics
+from events import broadcaster
+from sweeper import pending_payment_backlog
+
+def init_metrics_controller(app):
+    """Registers scrape-time gauges and the Prometheus /metrics route with the Flask app."""
+
+    def lot_rows():
+        return db.session.query(
+            ParkingLot.id, ParkingLot.prime_location_name, ParkingLot.occupied_spots, ParkingLot.max_spots
+        ).all()
+
+    def lot_occupancy():
+        for lot_id, name, occupied, max_spots in lot_rows():
+            yield (lot_id, name), occupied or 0
+
+    def lot_capacity():
+        for lot_id, name, occupied, max_spots in lot_rows():
+            yield (lot_id, name), max_spots
+
+    def active_reservations():
+        yield (), Reservation.query.filter(Reservation.end_time.is_(None)).count()
+
+    def pending_payments():
+        count, amount = pending_payment_backlog()
+        yield ('reservations',), count
+        yield ('amount',), amount
+
+    def pool_usage():
+        pool = db.engine.pool
+        for state, reader in (('size', 'size'), ('checked_out', 'checkedout'), ('checked_in', 'checkedin')):
+            if hasattr(pool, reader):
+                yield (state,), getattr(pool, reader)()
+
+    register(Gauge('parking_lot_occupied_spots', "Occupied spots per lot.", ('lot_id', 'lot'), lot_occupancy))
+    register(Gauge('parking_lot_capacity_spots', "Total spots per lot.", ('lot_id', 'lot'), lot_capacity))
+    register(Gauge('parking_active_reservations', "Reservations that have not ended.", (), active_reservations))
+    register(Gauge('parking_pending_payment_backlog', "Reservations awaiting payment and the amount they owe.",
+                   ('measure',), pending_payments))
+    register(Gauge('parking_db_pool_connections', "Database connection pool usage.", ('state',), pool_usage))
+    register(Gauge('parking_sse_subscribers', "Connected occupancy stream clients.", (),
+                   lambda: [((), broadcaster.subscriber_count())]))
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
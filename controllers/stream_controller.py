@@ -0,0 +1,35 @@
+# Parking App V1/controllers/stream_controller.py
+import json
+import queue
+from flask import Response
+from flask_login import login_required
+from events import broadcaster
+
+# Seconds between keep-alive comments so proxies do not close an idle stream
+HEARTBEAT_SECONDS = 15
+
+def init_stream_controller(app):
+    """Initializes server-sent event routes with the Flask app."""
+
+    @app.route('/api/stream/occupancy')
+    @login_required
+    def occupancy_stream():
+        def generate():
+            subscriber = broadcaster.subscribe()
+            try:
+                # Ask browsers to wait 5s before reconnecting after a dropped stream
+                yield "retry: 5000\n\n"
+                while True:
+                    try:
+                        event = subscriber.get(timeout=HEARTBEAT_SECONDS)
+                    except queue.Empty:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            finally:
+                broadcaster.unsubscribe(subscriber)
+
+        return Response(generate(), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
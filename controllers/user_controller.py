@@ -2,8 +2,18 @@
 from flask import render_template, redirect, url_for, request, flash, jsonify
 from flask_login import current_user, login_required
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 from models.models import db, User, ParkingLot, ParkingSpot, Reservation, Payment, Transaction
-from utils import create_transaction # Changed import path
+from utils import create_transaction, credit_balance, debit_balance, wallet_transactions_page, wallet_totals # Changed import path
+from booking import book_spot_for_user, LotFullError, ActiveReservationError
+from stats import bump_daily_stats, bump_hourly_stats, record_checkout
+from events import publish_lot_update
+from allocator import allocators
+from search import search_lots, search_args, LOT_FEATURES
+from fragments import render_lot_cards
+from settlement import enqueue_settlement
+from sweeper import enqueue_pending_payment_sweep
+from checkout import close_reservations, checkout_reservation, insert_checkout_records, release_occupancy
 
 def init_user_controller(app):
     """Initializes user routes with the Flask app."""
@@ -16,18 +26,29 @@ def init_user_controller(app):
             return redirect(url_for('home'))
 
         user = current_user
-        lots = ParkingLot.query.all()
-        reservations = Reservation.query.filter_by(user_id=user.id).order_by(Reservation.start_time.desc()).all()
+        filters = search_args(request.args)
+        lot_page = search_lots(**filters)
+        lots = lot_page.items
+        # Only the open booking and the ten latest stays are shown, loaded with their spot and lot
+        reservations = Reservation.query.options(
+            joinedload(Reservation.spot).joinedload(ParkingSpot.lot)
+        ).filter_by(user_id=user.id).order_by(Reservation.start_time.desc())
         
-        active_reservations = [res for res in reservations if res.end_time is None]
-        past_reservations = [res for res in reservations if res.end_time is not None][:10]
+        active_reservations = reservations.filter(Reservation.end_time.is_(None)).all()
+        past_reservations = reservations.filter(Reservation.end_time.isnot(None)).limit(10).all()
         
         total_spent = sum(res.cost for res in past_reservations if res.cost is not None)
         total_hours = sum(res.duration_hours() for res in past_reservations)
         
+        # Cards are shared by every user with the same booking state; only the reservation panels are per-user
+        lot_cards = render_lot_cards(lots, bool(active_reservations))
+        
         return render_template('user_dashboard.html', 
                                user=user,
                                lots=lots, 
+                               lot_cards=lot_cards,
+                               lot_page=lot_page,
+                               filters=filters,
                                active_reservations=active_reservations,
                                past_reservations=past_reservations,
                                total_spent=total_spent,
@@ -83,14 +104,19 @@ def init_user_controller(app):
     @app.route('/user/wallet')
     @login_required
     def user_wallet():
-        user_transactions = Transaction.query.filter_by(user_id=current_user.id).order_by(Transaction.created_at.desc()).all()
+        try:
+            user_transactions, next_cursor = wallet_transactions_page(current_user.id, request.args.get('cursor'))
+        except ValueError:
+            flash("Invalid page cursor.", "warning")
+            return redirect(url_for('user_wallet'))
 
-        total_spent = sum(t.amount for t in user_transactions if t.type in ['debit', 'reservation_payment'])
-        total_added = sum(t.amount for t in user_transactions if t.type == 'credit')
+        total_spent, total_added, transaction_count = wallet_totals(current_user.id)
 
         return render_template('user_wallet.html',
                                user=current_user,
                                transactions=user_transactions,
+                               next_cursor=next_cursor,
+                               transaction_count=transaction_count,
                                total_spent=total_spent,
                                total_added=total_added)
 
@@ -118,7 +144,7 @@ def init_user_controller(app):
                 return redirect(url_for('user_wallet'))
             
             user = current_user
-            user.balance += amount
+            credit_balance(user.id, amount)
             
             create_transaction(
                 user_id=user.id,
@@ -130,6 +156,8 @@ def init_user_controller(app):
             )
             
             db.session.commit()
+            # Settle any stay that was left unpaid now that the wallet has been topped up
+            enqueue_pending_payment_sweep(user.id)
             
             flash(f"₹{amount:.2f} successfully added to your wallet!", "success")
             
@@ -153,21 +181,19 @@ def init_user_controller(app):
             bank_account = request.form.get('bank_account', '')
             
             user = current_user
-            current_balance = user.balance
             
             if amount < 50:
                 flash("Minimum withdrawal amount is ₹50", "danger")
                 return redirect(url_for('user_wallet'))
             
-            if amount > current_balance:
-                flash("Insufficient balance for withdrawal", "danger")
-                return redirect(url_for('user_wallet'))
-            
             if not bank_account:
                 flash("Please provide bank account details.", "danger")
                 return redirect(url_for('user_wallet'))
             
-            user.balance -= amount
+            # Checked against the stored balance in the same UPDATE that debits it
+            if not debit_balance(user.id, amount):
+                flash("Insufficient balance for withdrawal", "danger")
+                return redirect(url_for('user_wallet'))
             
             create_transaction(
                 user_id=user.id,
@@ -179,6 +205,8 @@ def init_user_controller(app):
             )
             
             db.session.commit()
+            # The bank transfer runs on a background worker; the request only queues it
+            enqueue_settlement()
             
             flash(f"₹{amount:.2f} withdrawal request submitted successfully!", "success")
             
@@ -195,6 +223,51 @@ def init_user_controller(app):
     def wallet_balance_api():
         return jsonify({'balance': current_user.balance or 0})
 
+    @app.route('/api/wallet/transactions')
+    @login_required
+    def wallet_transactions_api():
+        try:
+            user_transactions, next_cursor = wallet_transactions_page(current_user.id, request.args.get('cursor'))
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+        return jsonify({
+            'transactions': [{
+                'id': t.id,
+                'amount': t.amount,
+                'type': t.type,
+                'description': t.description,
+                'reference_id': t.reference_id,
+                'payment_method': t.payment_method,
+                'status': t.status,
+                'created_at': t.created_at.isoformat()
+            } for t in user_transactions],
+            'next_cursor': next_cursor
+        })
+
+    @app.route('/api/lots/search')
+    @login_required
+    def search_lots_api():
+        lot_page = search_lots(**search_args(request.args))
+
+        return jsonify({
+            'lots': [{
+                'id': lot.id,
+                'name': lot.prime_location_name,
+                'address': lot.address,
+                'pin_code': lot.pin_code,
+                'price_per_hour': lot.price_per_hour,
+                'max_spots': lot.max_spots,
+                'available': lot.available_spots_count(),
+                'occupancy_rate': round(lot.occupancy_rate(), 1),
+                'features': [feature for feature in LOT_FEATURES if getattr(lot, feature)]
+            } for lot in lot_page.items],
+            'page': lot_page.page,
+            'pages': lot_page.pages,
+            'per_page': lot_page.per_page,
+            'total': lot_page.total
+        })
+
     @app.route('/book/<int:lot_id>', methods=['POST'])
     @login_required
     def book_spot(lot_id):
@@ -204,14 +277,16 @@ def init_user_controller(app):
 
         user = current_user
         lot = ParkingLot.query.get(lot_id)
+        if not lot:
+            flash("Parking lot not found!", "danger")
+            return redirect(url_for('user_dashboard'))
         
         active_reservation = Reservation.query.filter_by(user_id=user.id, end_time=None).first()
         if active_reservation:
             flash("You already have an active reservation! Please release it before booking a new spot.", "warning")
             return redirect(url_for('user_dashboard'))
         
-        spot = ParkingSpot.query.filter_by(lot_id=lot_id, status='A').first()
-        if not spot:
+        if lot.available_spots_count() <= 0:
             flash("No available spots in this lot!", "danger")
             return redirect(url_for('user_dashboard'))
 
@@ -221,20 +296,15 @@ def init_user_controller(app):
             return redirect(url_for('user_wallet'))
 
         try:
-            spot.status = 'O'
-            reservation = Reservation(
-                user_id=user.id, 
-                spot_id=spot.id, 
-                start_time=datetime.utcnow(),
-                vehicle_number=user.vehicle_number,
-                status='active'
-            )
-            db.session.add(reservation)
-            db.session.commit()
+            reservation = book_spot_for_user(user, lot)
+            publish_lot_update(lot, [reservation.spot])
             
-            flash(f"Spot {spot.spot_number} booked successfully at {lot.prime_location_name}! Initial hold of ₹{estimated_cost:.2f} applied.", "success")
+            flash(f"Spot {reservation.spot.spot_number} booked successfully at {lot.prime_location_name}! Initial hold of ₹{estimated_cost:.2f} applied.", "success")
+        except LotFullError:
+            flash("No available spots in this lot!", "danger")
+        except ActiveReservationError:
+            flash("You already have an active reservation! Please release it before booking a new spot.", "warning")
         except Exception as e:
-            db.session.rollback()
             flash(f"Error booking spot: {str(e)}", "danger")
         
         return redirect(url_for('user_dashboard'))
@@ -252,48 +322,31 @@ def init_user_controller(app):
                 flash("Reservation not found or unauthorized!", "danger")
                 return redirect(url_for('user_dashboard'))
 
-            if reservation.end_time is None:
+            ended_at = datetime.utcnow()
+            if reservation.end_time is None and close_reservations([reservation.id], ended_at):
                 user = current_user
-                spot = ParkingSpot.query.get(reservation.spot_id)
+                spot = reservation.spot
                 
-                reservation.end_time = datetime.utcnow()
+                record = checkout_reservation(reservation, ended_at)
+                release_occupancy({spot.lot_id: 1})
+                bump_hourly_stats(record_checkout({}, spot.lot_id, reservation, paid=record is not None))
                 duration_hours = reservation.duration_hours()
-                cost = round(duration_hours * spot.lot.price_per_hour, 2)
-                
-                reservation.cost = cost
-                reservation.status = 'completed'
+                cost = reservation.cost
                 
-                spot.status = 'A'
-                
-                if user.balance >= cost:
-                    user.balance -= cost
-                    
-                    payment = Payment(
-                        user_id=user.id,
-                        reservation_id=reservation.id,
-                        amount=cost,
-                        payment_method='wallet',
-                        payment_status='completed',
-                        completed_at=datetime.utcnow()
-                    )
-                    db.session.add(payment)
-
-                    create_transaction(
-                        user_id=user.id,
-                        amount=cost,
-                        transaction_type='debit',
-                        description=f"Payment for reservation {reservation.id} at {spot.lot.prime_location_name}",
-                        payment_method='wallet',
-                        status='completed'
-                    )
+                if record is not None:
+                    insert_checkout_records([record])
+                    bump_daily_stats(ended_at.date(), revenue=cost)
 
                     db.session.commit()
+                    allocators.release(spot.lot_id, spot.id)
+                    publish_lot_update(spot.lot, [spot])
                     
                     flash(f"Spot released! Duration: {duration_hours:.1f}h, Total Cost: ₹{cost:.2f}.", "success")
                 else:
                     flash(f"Insufficient balance for payment (₹{cost:.2f})! Please add funds immediately to avoid penalties.", "danger")
-                    reservation.status = 'pending_payment'
                     db.session.commit()
+                    allocators.release(spot.lot_id, spot.id)
+                    publish_lot_update(spot.lot, [spot])
                     return redirect(url_for('user_wallet'))
             else:
                 flash("This reservation was already completed!", "warning")
@@ -1,34 +1,35 @@
 import os
+import argparse
+from datetime import date
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash
 import sqlite3
-from models.models import db, User  # Import from your models.py
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex
+from models.models import db, User, ParkingLot  # Import from your models.py
+from config import configure_database, init_database, database_path
+from stats import backfill_system_stats, backfill_hourly_stats, backfill_missing_stats
+from synthetic_data import generate_synthetic_data
+from search import create_lot_search_index, LOT_FTS_TABLE
+from archive import create_archive_tables, archive_old_records, ARCHIVE_AFTER_DAYS
 
 # ---------------- Flask App Setup ----------------
 app = Flask(__name__, instance_relative_config=True) # Enable instance_relative_config
-app.config.from_mapping(
-    SQLALCHEMY_DATABASE_URI=f'sqlite:///{os.path.join(app.instance_path, "parking.db")}',
-    SQLALCHEMY_TRACK_MODIFICATIONS=False
-)
 
-# Ensure the instance folder exists
-# This is crucial for placing the database file within 'instance/'
-try:
-    os.makedirs(app.instance_path)
-except OSError:
-    pass # instance folder already exists
+# Shared with app.py so both point at the same database file and engine profile
+configure_database(app)
 
 # Initialize db with app
-db.init_app(app)
+init_database(app)
 
 # ---------------- Database Migration Function ----------------
 def migrate_database():
     """Handle database migration for new columns"""
     try:
         # Connect directly to SQLite to add missing columns
-        # Use app.instance_path to ensure connection to the correct DB file
-        db_path = os.path.join(app.instance_path, 'parking.db')
+        # Use the shared database_path so migrations hit the same file as app.py
+        db_path = database_path(app)
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
@@ -56,6 +57,49 @@ def migrate_database():
             migrations_applied = True
             print("    ✅ max_parking_limit column added successfully")
         
+        if 'occupied_spots' not in columns:
+            print("    Adding missing occupied_spots column...")
+            cursor.execute("ALTER TABLE parking_lots ADD COLUMN occupied_spots INTEGER DEFAULT 0 NOT NULL")
+            
+            # Seed the counter from the current spot statuses
+            cursor.execute("""
+                UPDATE parking_lots 
+                SET occupied_spots = (
+                    SELECT COUNT(*) FROM parking_spots 
+                    WHERE parking_spots.lot_id = parking_lots.id AND parking_spots.status = 'O'
+                )
+            """)
+            
+            migrations_applied = True
+            print("    ✅ occupied_spots column added successfully")
+        
+        # Create any index declared on the models that an older database is missing
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        existing_indexes = {row[0] for row in cursor.fetchall()}
+        
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    continue
+                print(f"    Creating missing index {index.name}...")
+                try:
+                    cursor.execute(str(CreateIndex(index).compile(dialect=sqlite.dialect())))
+                    migrations_applied = True
+                    print(f"    ✅ {index.name} created successfully")
+                except sqlite3.IntegrityError as e:
+                    # A unique index cannot be built while duplicate rows exist; they need manual cleanup first
+                    print(f"    ⚠️  Could not create {index.name}: {e}")
+        
+        # Full-text index for lot search; existing lots are indexed when it is first created
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (LOT_FTS_TABLE,))
+        if cursor.fetchone() is None:
+            print(f"    Creating lot search index {LOT_FTS_TABLE}...")
+            if create_lot_search_index(cursor):
+                migrations_applied = True
+                print(f"    ✅ {LOT_FTS_TABLE} created successfully")
+            else:
+                print("    ⚠️  SQLite was built without FTS5; lot search will use LIKE prefix matching")
+        
         # You can add more migration checks here in the future
         # Example:
         # if 'new_column' not in columns:
@@ -89,6 +133,20 @@ def setup_database():
     # Run migrations for existing databases
     migrate_database()
     
+    # Archived history lives in a separate file attached to every connection
+    create_archive_tables()
+    print("✅ Archive tables ready!")
+    
+    # Recount per-lot occupancy in case the counters have drifted
+    ParkingLot.rebuild_occupancy_counts()
+    db.session.commit()
+    print("✅ Occupancy counters rebuilt!")
+    
+    # Databases created before the rollups existed have history but no stats rows
+    for table in backfill_missing_stats():
+        print(f"✅ {table} backfilled from existing history!")
+    db.session.commit()
+    
     # Create default admin if not exists
     admin_exists = User.query.filter_by(username='admin').first()
     
@@ -120,5 +178,41 @@ def setup_database():
 
 # ---------------- Run Setup ----------------
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Create, migrate and maintain the parking database.")
+    parser.add_argument('--backfill-stats', action='store_true',
+                        help="Rebuild the SystemStats and BookingHourlyStats rollups from historical payments and reservations")
+    parser.add_argument('--synthetic', action='store_true',
+                        help="Bulk-load synthetic lots, users and booking history for performance testing")
+    parser.add_argument('--lots', type=int, default=50, help="Synthetic lots to create")
+    parser.add_argument('--users', type=int, default=10000, help="Synthetic users to create")
+    parser.add_argument('--reservations', type=int, default=500000, help="Synthetic past reservations to create")
+    parser.add_argument('--days', type=int, default=180, help="How many days of history to spread reservations over")
+    parser.add_argument('--seed', type=int, default=42,
+                        help="Random seed; the same seed and --end-date give the same data")
+    parser.add_argument('--end-date', type=date.fromisoformat, default=None,
+                        help="Last day of synthetic history as YYYY-MM-DD (exclusive); defaults to today in UTC")
+    parser.add_argument('--archive', action='store_true',
+                        help="Move settled reservations, payments and transactions into the archive database")
+    parser.add_argument('--archive-after-days', type=int, default=ARCHIVE_AFTER_DAYS,
+                        help="Only archive history older than this many days")
+    args = parser.parse_args()
+
     with app.app_context():
-        setup_database()
\ No newline at end of file
+        setup_database()
+
+        if args.synthetic:
+            generate_synthetic_data(args.lots, args.users, args.reservations, args.seed, args.days, args.end_date)
+
+        # Synthetic history bypasses the per-booking rollup updates, so rebuild them afterwards
+        if args.backfill_stats or args.synthetic:
+            days = backfill_system_stats()
+            db.session.commit()
+            print(f"✅ SystemStats backfilled for {days} day(s)!")
+            buckets = backfill_hourly_stats()
+            db.session.commit()
+            print(f"✅ BookingHourlyStats backfilled for {buckets} lot-hour(s)!")
+
+        if args.archive:
+            moved = archive_old_records(args.archive_after_days)
+            for table, count in moved.items():
+                print(f"✅ Archived {count} {table} row(s) older than {args.archive_after_days} day(s)")
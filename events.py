@@ -0,0 +1,64 @@
+# Parking App V1/events.py
+import queue
+import threading
+from cache import VersionCounter
+
+# Events buffered per client before it is considered too slow and told to resync
+SUBSCRIBER_QUEUE_SIZE = 100
+
+class OccupancyBroadcaster:
+    """Fans occupancy events out to every SSE client connected to this process."""
+
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # A stalled client missed events; drop its backlog and have it reload the full state
+                with subscriber.mutex:
+                    subscriber.queue.clear()
+                subscriber.put_nowait({'type': 'resync'})
+
+broadcaster = OccupancyBroadcaster()
+
+# Bumped on every spot status or layout change; keys the cached /api/lot/<id>/layout responses
+lot_versions = VersionCounter()
+
+def publish_lot_update(lot, spots=()):
+    """Bumps the lot's version and publishes its counts and the spots whose status just changed. Call after commit."""
+    lot_versions.bump(lot.id)
+    broadcaster.publish({
+        'type': 'lot',
+        'lot_id': lot.id,
+        'occupied': lot.total_occupied_spots(),
+        'available': lot.available_spots_count(),
+        'max_spots': lot.max_spots,
+        'occupancy_rate': lot.occupancy_rate(),
+        'spots': [{'id': spot.id, 'number': spot.spot_number, 'status': spot.status} for spot in spots]
+    })
+
+def publish_layout_change(lot_id):
+    """Bumps the lot's version and tells clients it was created, resized, edited or deleted."""
+    lot_versions.bump(lot_id)
+    broadcaster.publish({'type': 'layout', 'lot_id': lot_id})
@@ -0,0 +1,119 @@
+# Parking App V1/exports.py
+import csv
+import io
+import json
+from datetime import datetime, time, timedelta
+from models.models import db, ParkingSpot, Reservation, Payment, Transaction
+from archive import ARCHIVE_TABLES, not_yet_archived
+
+# Rows fetched from the cursor per round-trip and written per response chunk
+EXPORT_CHUNK_SIZE = 5000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Exportable tables and the timestamp their start/end filters apply to
+EXPORT_TABLES = {
+    'reservations': (Reservation, 'start_time'),
+    'payments': (Payment, 'payment_date'),
+    'transactions': (Transaction, 'created_at'),
+}
+
+def raw_column(column):
+    """Selects date and datetime columns as the stored ISO text, skipping per-value datetime parsing."""
+    if isinstance(column.type, (db.DateTime, db.Date)):
+        return db.type_coerce(column, db.String).label(column.name)
+    return column
+
+def export_select(model, table, date_column, start_date, end_date, lot_id):
+    """Builds the export SELECT for one physical table (live or archive) with the lot resolved per row."""
+    spots = ParkingSpot.__table__
+    columns = [raw_column(column) for column in table.columns]
+
+    if model is Reservation:
+        query = db.select(*columns, spots.c.lot_id).select_from(
+            table.outerjoin(spots, spots.c.id == table.c.spot_id))
+    elif model is Payment:
+        # A payment's reservation may be live or archived, so look in both
+        live = Reservation.__table__.alias('live_reservations')
+        archived = ARCHIVE_TABLES[Reservation].alias('archived_reservations')
+        spot_id = db.func.coalesce(live.c.spot_id, archived.c.spot_id)
+        query = db.select(*columns, spots.c.lot_id).select_from(
+            table.outerjoin(live, live.c.id == table.c.reservation_id)
+            .outerjoin(archived, archived.c.id == table.c.reservation_id)
+            .outerjoin(spots, spots.c.id == spot_id))
+    else:
+        query = db.select(*columns)
+
+    if start_date:
+        query = query.where(table.c[date_column] >= datetime.combine(start_date, time.min))
+    if end_date:
+        # end_date is inclusive, so compare against the start of the next day
+        query = query.where(table.c[date_column] < datetime.combine(end_date + timedelta(days=1), time.min))
+    if lot_id is not None:
+        query = query.where(spots.c.lot_id == lot_id)
+    if table is model.__table__:
+        query = query.where(not_yet_archived(model))
+    return query
+
+def export_query(kind, start_date=None, end_date=None, lot_id=None):
+    """Returns (column names, statement) for an export; raises ValueError for an unknown table or filter.
+
+    Archived rows come first, then live rows. A single UNION ALL statement reads both from one snapshot and
+    skips live rows that already have an archive copy, so rows archived mid-export are neither missed nor
+    repeated.
+    """
+    if kind not in EXPORT_TABLES:
+        raise ValueError(f"Unknown export '{kind}'; choose one of {', '.join(EXPORT_TABLES)}")
+    model, date_column = EXPORT_TABLES[kind]
+    if lot_id is not None and model is Transaction:
+        raise ValueError("Transactions are not linked to a lot and cannot be filtered by lot_id")
+    if start_date and end_date and start_date > end_date:
+        raise ValueError("start must not be after end")
+
+    names = [column.name for column in model.__table__.columns]
+    if model is not Transaction:
+        names.append('lot_id')
+    statement = db.union_all(*(
+        export_select(model, table, date_column, start_date, end_date, lot_id)
+        for table in (ARCHIVE_TABLES[model], model.__table__)
+    ))
+    return names, statement
+
+def export_chunks(statement, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields lists of row tuples from a streaming cursor, so memory stays flat whatever the row count."""
+    with db.engine.connect() as connection:
+        result = connection.execution_options(yield_per=chunk_size).execute(statement)
+        for partition in result.partitions():
+            yield partition
+
+def encode_csv(names, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Covers the header of an empty export
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def encode_ndjson(names, chunks):
+    for rows in chunks:
+        yield ''.join(json.dumps(dict(zip(names, row))) + '\n' for row in rows)
+
+ENCODERS = {'csv': encode_csv, 'ndjson': encode_ndjson}
+
+def stream_export(kind, fmt, start_date=None, end_date=None, lot_id=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Validates an export request and returns a generator of text chunks in the requested format.
+
+    Raises ValueError up front, before any output is produced, so the caller can still answer with a 400.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'; choose one of {', '.join(EXPORT_FORMATS)}")
+    names, statement = export_query(kind, start_date, end_date, lot_id)
+    return ENCODERS[fmt](names, export_chunks(statement, chunk_size))
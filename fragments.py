@@ -0,0 +1,40 @@
+# Parking App V1/fragments.py
+from flask import render_template
+from markupsafe import Markup
+from cache import LRUCache
+from events import lot_versions
+from search import preview_spots
+
+# Seconds a rendered card may live; bounds staleness from bookings made by other processes
+LOT_CARD_CACHE_TTL = 60
+
+# Rendered user-dashboard lot cards, keyed by lot_card_key
+lot_card_cache = LRUCache(maxsize=2048, ttl=LOT_CARD_CACHE_TTL)
+
+def lot_card_key(lot, has_active_reservation):
+    """Changes whenever the card's HTML could: a local booking, release or edit bumps the version, and the
+    occupied count from the freshly loaded lot row catches bookings made by other processes."""
+    return (lot.id, lot_versions.get(lot.id), lot.occupied_spots, has_active_reservation)
+
+def render_lot_cards(lots, has_active_reservation):
+    """Returns the rendered card for each lot, rendering only cache misses and loading spot previews just for them."""
+    cards = {}
+    missing = []
+    for lot in lots:
+        html = lot_card_cache.get(lot_card_key(lot, has_active_reservation))
+        if html is None:
+            missing.append(lot)
+        else:
+            cards[lot.id] = html
+
+    if missing:
+        previews = preview_spots(missing)
+        for lot in missing:
+            html = Markup(render_template('lot_card.html',
+                                          lot=lot,
+                                          preview_spots=previews[lot.id],
+                                          has_active_reservation=has_active_reservation))
+            lot_card_cache.set(lot_card_key(lot, has_active_reservation), html)
+            cards[lot.id] = html
+
+    return [cards[lot.id] for lot in lots]
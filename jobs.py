@@ -0,0 +1,112 @@
+# Parking App V1/jobs.py
+import queue
+import threading
+import time
+from models.models import db
+from metrics import register, Counter, Histogram
+
+# Defaults, overridden by JOB_WORKERS / JOBS_ENABLED in app.config
+JOB_WORKERS = 2
+
+JOB_RUNS = register(Counter(
+    'parking_background_jobs_total', "Background job runs by job name and outcome.",
+    ('job', 'outcome')))
+
+JOB_DURATION = register(Histogram(
+    'parking_background_job_duration_seconds', "Background job run time by job name.",
+    ('job',)))
+
+class JobQueue:
+    """In-process job queue drained by a small pool of worker threads, each running jobs inside an app context.
+
+    A job submitted under a name that is already waiting is dropped, so a burst of triggers collapses into
+    one run. Jobs must be idempotent: anything still pending when the process stops is picked up by the
+    next scheduled run.
+    """
+
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        self.app = None
+        self.enabled = True
+        self._queue = queue.Queue()
+        self._waiting = set()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._schedules = []
+
+    def configure(self, app, workers, enabled=True):
+        self.app = app
+        self.workers = workers
+        self.enabled = enabled
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, name, func, *args):
+        """Queues func(*args) under a job name; returns False if an identical job is already waiting."""
+        if not self.enabled:
+            return False
+        key = (name, args)
+        with self._lock:
+            if key in self._waiting:
+                return False
+            self._waiting.add(key)
+        self._start()
+        self._queue.put((key, func, args))
+        return True
+
+    def schedule(self, name, func, interval):
+        """Submits func every interval seconds from a daemon timer thread."""
+        if not self.enabled:
+            return
+
+        def tick():
+            while True:
+                time.sleep(interval)
+                self.submit(name, func)
+
+        thread = threading.Thread(target=tick, name=f'job-schedule-{name}', daemon=True)
+        thread.start()
+        self._schedules.append(thread)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def join(self):
+        """Blocks until every queued job has finished; used by scripts and smoke checks."""
+        self._queue.join()
+
+    def _work(self):
+        while True:
+            key, func, args = self._queue.get()
+            name = key[0]
+            with self._lock:
+                self._waiting.discard(key)
+            started_at = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    try:
+                        func(*args)
+                    finally:
+                        db.session.remove()
+                JOB_RUNS.inc((name, 'success'))
+            except Exception:
+                JOB_RUNS.inc((name, 'error'))
+                self.app.logger.exception("Background job %s failed", name)
+            finally:
+                JOB_DURATION.observe((name,), time.perf_counter() - started_at)
+                self._queue.task_done()
+
+jobs = JobQueue()
+
+def init_jobs(app):
+    """Binds the shared job queue to the app; JOBS_ENABLED=False turns background work off."""
+    app.config.setdefault('JOB_WORKERS', JOB_WORKERS)
+    app.config.setdefault('JOBS_ENABLED', True)
+    jobs.configure(app, app.config['JOB_WORKERS'], app.config['JOBS_ENABLED'])
@@ -0,0 +1,261 @@
+# Parking App V1/loadtest.py
+# Load-test harness for a locally running instance. Seed the database the app uses, start the app, then drive it:
+#     python loadtest.py seed --lots 20 --users 200
+#     python app.py
+#     python loadtest.py run --clients 50 --admins 2 --duration 60 --output report.json
+import argparse
+import http.cookiejar
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+LOAD_LOT_PREFIX = 'Load Lot'
+LOAD_USER_PREFIX = 'loaduser'
+LOAD_USER_PASSWORD = 'loadtest123'
+
+# Relative weights of the actions a user client picks from on each iteration
+USER_ACTION_WEIGHTS = {
+    'dashboard': 40,
+    'layout': 30,
+    'book': 15,
+    'release': 15,
+}
+
+RELEASE_LINK = re.compile(r'/release/(\d+)')
+
+# ---------------- Seeding ----------------
+def seed(lots, users, rows, cols, balance):
+    """Creates load-test lots and users through the same models and setup as database_creator.py."""
+    from database_creator import app, setup_database
+    from models.models import db, User, ParkingLot
+    from utils import create_spots_for_lot
+    from passwords import hasher
+
+    with app.app_context():
+        setup_database()
+
+        existing_lots = ParkingLot.query.filter(ParkingLot.prime_location_name.like(f'{LOAD_LOT_PREFIX}%')).count()
+        for i in range(existing_lots, lots):
+            lot = ParkingLot(
+                prime_location_name=f'{LOAD_LOT_PREFIX} {i + 1}',
+                address=f'{i + 1} Benchmark Road',
+                pin_code=f'{560000 + i}',
+                price_per_hour=random.choice([20.0, 30.0, 40.0, 50.0]),
+                layout_rows=rows,
+                layout_cols=cols,
+                max_spots=rows * cols,
+                max_parking_limit=max(100, rows * cols)
+            )
+            db.session.add(lot)
+            db.session.flush()
+            create_spots_for_lot(lot)
+        db.session.commit()
+
+        # Hashing once and reusing the hash keeps seeding fast for large user counts
+        password_hash = hasher.hash(LOAD_USER_PASSWORD)
+
+        existing_users = User.query.filter(User.username.like(f'{LOAD_USER_PREFIX}%')).count()
+        for i in range(existing_users, users):
+            db.session.add(User(
+                username=f'{LOAD_USER_PREFIX}{i}',
+                email=f'{LOAD_USER_PREFIX}{i}@load.test',
+                password=password_hash,
+                role='user',
+                balance=balance,
+                vehicle_number=f'LT{i:06d}'
+            ))
+        db.session.commit()
+
+        lot_count = ParkingLot.query.filter(ParkingLot.prime_location_name.like(f'{LOAD_LOT_PREFIX}%')).count()
+        user_count = User.query.filter(User.username.like(f'{LOAD_USER_PREFIX}%')).count()
+
+    print(f"✅ Seeded {lot_count} load-test lots and {user_count} load-test users")
+
+# ---------------- Recording ----------------
+class RouteStats:
+    """Collects latencies per route label across all client threads."""
+
+    def __init__(self):
+        self._latencies = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, ok):
+        with self._lock:
+            self._latencies.setdefault(route, []).append(seconds)
+            if not ok:
+                self._errors[route] = self._errors.get(route, 0) + 1
+
+    def report(self, elapsed):
+        routes = {}
+        with self._lock:
+            for route, latencies in sorted(self._latencies.items()):
+                ordered = sorted(latencies)
+                routes[route] = {
+                    'requests': len(ordered),
+                    'errors': self._errors.get(route, 0),
+                    'throughput_rps': round(len(ordered) / elapsed, 2),
+                    'p50_ms': percentile(ordered, 50),
+                    'p95_ms': percentile(ordered, 95),
+                    'p99_ms': percentile(ordered, 99),
+                    'max_ms': round(ordered[-1] * 1000, 2),
+                }
+        return routes
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list of seconds, in milliseconds."""
+    index = max(0, min(len(ordered) - 1, math.ceil(pct * len(ordered) / 100) - 1))
+    return round(ordered[index] * 1000, 2)
+
+# ---------------- Clients ----------------
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Reports redirects as responses so each route is timed on its own."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+class Client:
+    """One simulated browser with its own cookie jar."""
+
+    def __init__(self, base_url, stats):
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            NoRedirect()
+        )
+
+    def request(self, route, path, data=None):
+        """Issues a request and records it under the route label; returns (status, body)."""
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        started = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, data=body, timeout=30) as response:
+                status, content = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, content = e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            status, content = 0, b''
+        self.stats.record(route, time.perf_counter() - started, 0 < status < 400)
+        return status, content
+
+    def login(self, username, password):
+        status, _ = self.request('POST /login', '/login', {'username': username, 'password': password})
+        return status == 302
+
+def user_client(client, username, lot_ids, stop_at, rng):
+    if not client.login(username, LOAD_USER_PASSWORD):
+        return
+    actions = list(USER_ACTION_WEIGHTS)
+    weights = list(USER_ACTION_WEIGHTS.values())
+    reservation_id = None
+
+    while time.time() < stop_at:
+        action = rng.choices(actions, weights)[0]
+        if action in ('book', 'release'):
+            # Keep the book/release mix realistic: a user with a car parked leaves before booking again
+            action = 'release' if reservation_id else 'book'
+
+        if action == 'dashboard':
+            _, page = client.request('GET /user/dashboard', '/user/dashboard')
+            match = RELEASE_LINK.search(page.decode(errors='ignore'))
+            reservation_id = match.group(1) if match else None
+        elif action == 'layout':
+            client.request('GET /api/lot/<id>/layout', f'/api/lot/{rng.choice(lot_ids)}/layout')
+        elif action == 'book':
+            client.request('POST /book/<lot_id>', f'/book/{rng.choice(lot_ids)}', {})
+            _, page = client.request('GET /user/dashboard', '/user/dashboard')
+            match = RELEASE_LINK.search(page.decode(errors='ignore'))
+            reservation_id = match.group(1) if match else None
+        else:
+            client.request('POST /release/<id>', f'/release/{reservation_id}', {})
+            reservation_id = None
+
+def admin_client(client, username, password, stop_at, rng):
+    if not client.login(username, password):
+        return
+    while time.time() < stop_at:
+        client.request('GET /admin/dashboard', '/admin/dashboard')
+        time.sleep(rng.uniform(0.5, 2.0))
+
+def run(base_url, clients, admins, duration, admin_username, admin_password, seed_value):
+    """Drives the mixed workload and returns the JSON-ready report."""
+    from database_creator import app
+    from models.models import db, User, ParkingLot
+
+    with app.app_context():
+        lot_ids = [lot_id for (lot_id,) in db.session.query(ParkingLot.id).filter(
+            ParkingLot.prime_location_name.like(f'{LOAD_LOT_PREFIX}%'))]
+        usernames = [name for (name,) in db.session.query(User.username).filter(
+            User.username.like(f'{LOAD_USER_PREFIX}%')).order_by(User.id).limit(clients)]
+    if not lot_ids or not usernames:
+        raise SystemExit("❌ No load-test data found. Run 'python loadtest.py seed' first.")
+
+    stats = RouteStats()
+    stop_at = time.time() + duration
+    threads = []
+    for i, username in enumerate(usernames):
+        rng = random.Random(seed_value + i)
+        threads.append(threading.Thread(target=user_client,
+                                        args=(Client(base_url, stats), username, lot_ids, stop_at, rng)))
+    for i in range(admins):
+        rng = random.Random(seed_value - i - 1)
+        threads.append(threading.Thread(target=admin_client,
+                                        args=(Client(base_url, stats), admin_username, admin_password, stop_at, rng)))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    routes = stats.report(elapsed)
+    return {
+        'base_url': base_url,
+        'clients': len(usernames),
+        'admins': admins,
+        'duration_s': round(elapsed, 2),
+        'total_requests': sum(route['requests'] for route in routes.values()),
+        'total_errors': sum(route['errors'] for route in routes.values()),
+        'routes': routes,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Seed and load-test a local parking app instance.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help="Create load-test lots and users")
+    seed_parser.add_argument('--lots', type=int, default=20)
+    seed_parser.add_argument('--users', type=int, default=200)
+    seed_parser.add_argument('--rows', type=int, default=5)
+    seed_parser.add_argument('--cols', type=int, default=10)
+    seed_parser.add_argument('--balance', type=float, default=100000.0)
+
+    run_parser = commands.add_parser('run', help="Drive the mixed workload and report per-route latency")
+    run_parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    run_parser.add_argument('--clients', type=int, default=50)
+    run_parser.add_argument('--admins', type=int, default=2)
+    run_parser.add_argument('--duration', type=float, default=60.0)
+    run_parser.add_argument('--admin-username', default='admin')
+    run_parser.add_argument('--admin-password', default='admin123')
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--output', help="Also write the JSON report to this file")
+
+    args = parser.parse_args()
+    if args.command == 'seed':
+        seed(args.lots, args.users, args.rows, args.cols, args.balance)
+    else:
+        report = run(args.base_url, args.clients, args.admins, args.duration,
+                     args.admin_username, args.admin_password, args.seed)
+        output = json.dumps(report, indent=2)
+        print(output)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(output)
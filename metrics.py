@@ -0,0 +1,166 @@
+# Parking App V1/metrics.py
+import threading
+import time
+from flask import g, request
+
+# Latency buckets in seconds, from cached layout hits up to slow dashboard renders
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Shards kept before add() folds finished threads; doubles with the number of live threads
+SHARD_PRUNE_THRESHOLD = 64
+
+class ShardedCounts:
+    """Per-thread count dicts merged at scrape time, so recording only takes a lock on a thread's first add."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = {}
+        self._prune_at = SHARD_PRUNE_THRESHOLD
+
+    def add(self, key, amount=1):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+                # Per-request server threads would otherwise pile up until the next scrape
+                if len(self._shards) >= self._prune_at:
+                    self._fold_finished_shards()
+                    self._prune_at = max(SHARD_PRUNE_THRESHOLD, 2 * len(self._shards))
+        shard[key] = shard.get(key, 0) + amount
+
+    def _fold_finished_shards(self):
+        """Merges the shards of threads that have exited into one dict. Caller holds the lock."""
+        live_shards = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live_shards.append((thread, shard))
+                continue
+            for key, value in shard.items():
+                self._retired[key] = self._retired.get(key, 0) + value
+        self._shards = live_shards
+
+    def shard_count(self):
+        with self._lock:
+            return len(self._shards)
+
+    def totals(self):
+        with self._lock:
+            self._fold_finished_shards()
+            totals = dict(self._retired)
+            for _, shard in self._shards:
+                for key, value in shard.copy().items():
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._counts = ShardedCounts()
+
+    def inc(self, labels=(), amount=1):
+        self._counts.add(tuple(labels), amount)
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._counts.totals().items()):
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {value}"
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._counts = ShardedCounts()
+
+    def observe(self, labels, value):
+        labels = tuple(labels)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self._counts.add((labels, index))
+                break
+        else:
+            self._counts.add((labels, len(self.buckets)))
+        self._counts.add((labels, 'sum'), value)
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        totals = self._counts.totals()
+        for labels in sorted({labels for labels, _ in totals}):
+            cumulative = 0
+            for index, bound in enumerate(self.buckets + (float('inf'),)):
+                cumulative += totals.get((labels, index), 0)
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f"{self.name}_bucket{format_labels(self.labelnames + ('le',), labels + (le,))} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.labelnames, labels)} {totals.get((labels, 'sum'), 0)}"
+            yield f"{self.name}_count{format_labels(self.labelnames, labels)} {cumulative}"
+
+class Gauge:
+    """A metric whose samples are produced by a callback at scrape time."""
+
+    def __init__(self, name, documentation, labelnames, collector, kind='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.collector = collector
+        self.kind = kind
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in self.collector():
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {value}"
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+# Every metric rendered by /metrics, in registration order
+REGISTRY = []
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+def render_metrics():
+    """Renders every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+REQUEST_COUNT = register(Counter(
+    'parking_http_requests_total', "HTTP requests by endpoint, method and status.",
+    ('endpoint', 'method', 'status')))
+
+REQUEST_LATENCY = register(Histogram(
+    'parking_http_request_duration_seconds', "HTTP request latency by endpoint.",
+    ('endpoint',)))
+
+def init_metrics(app):
+    """Times every request handled by the app's routes."""
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started_at = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started_at = g.get('request_started_at')
+        if started_at is not None:
+            endpoint = request.endpoint or 'unmatched'
+            REQUEST_COUNT.inc((endpoint, request.method, response.status_code))
+            REQUEST_LATENCY.observe((endpoint,), time.perf_counter() - started_at)
+        return response
@@ -1,5 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import hasher
 from flask_login import UserMixin
 from datetime import datetime, timedelta, date # Import date and timedelta
 
@@ -24,10 +24,11 @@ class User(db.Model, UserMixin):
     transactions = db.relationship('Transaction', backref='user', lazy=True)
 
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        matches, _ = hasher.verify(self.password, password)
+        return matches
 
     def get_id(self):
         return str(self.id)
@@ -37,6 +38,11 @@ class User(db.Model, UserMixin):
 
 class ParkingLot(db.Model):
     __tablename__ = 'parking_lots'
+    __table_args__ = (
+        # Lot search: pin code prefix ranges sorted by price, and price range/sort on its own
+        db.Index('ix_parking_lots_pin_code_price', 'pin_code', 'price_per_hour'),
+        db.Index('ix_parking_lots_price', 'price_per_hour'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     prime_location_name = db.Column(db.String(100), nullable=False)
     address = db.Column(db.String(255), nullable=False)
@@ -46,6 +52,7 @@ class ParkingLot(db.Model):
     layout_cols = db.Column(db.Integer, default=0, nullable=False) # For grid layout
     max_spots = db.Column(db.Integer, default=0, nullable=False) # Total spots based on layout
     max_parking_limit = db.Column(db.Integer, default=100, nullable=False) # Overall max limit
+    occupied_spots = db.Column(db.Integer, default=0, nullable=False) # Denormalized count of 'O' spots
 
     # Features
     has_security = db.Column(db.Boolean, default=False)
@@ -55,7 +62,21 @@ class ParkingLot(db.Model):
     parking_spots = db.relationship('ParkingSpot', backref='lot', lazy=True, cascade="all, delete-orphan") # Renamed to 'lot'
 
     def total_occupied_spots(self):
-        return ParkingSpot.query.filter_by(lot_id=self.id, status='O').count()
+        return self.occupied_spots or 0
+
+    def refresh_occupancy(self):
+        """Recounts occupied spots from the database, fixing any drift in the counter."""
+        self.occupied_spots = ParkingSpot.query.filter_by(lot_id=self.id, status='O').count()
+        return self.occupied_spots
+
+    @staticmethod
+    def rebuild_occupancy_counts():
+        """Recomputes occupied_spots for every lot in a single UPDATE. Caller commits."""
+        occupied = db.select(db.func.count(ParkingSpot.id)).where(
+            ParkingSpot.lot_id == ParkingLot.id,
+            ParkingSpot.status == 'O'
+        ).scalar_subquery()
+        db.session.execute(db.update(ParkingLot).values(occupied_spots=occupied))
 
     def available_spots_count(self):
         return self.max_spots - self.total_occupied_spots()
@@ -70,6 +91,9 @@ class ParkingLot(db.Model):
 
 class ParkingSpot(db.Model):
     __tablename__ = 'parking_spots'
+    __table_args__ = (
+        db.Index('ix_parking_spots_lot_status', 'lot_id', 'status'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     lot_id = db.Column(db.Integer, db.ForeignKey('parking_lots.id'), nullable=False) # Changed to lot_id
     spot_number = db.Column(db.String(10), nullable=False)
@@ -88,6 +112,14 @@ class ParkingSpot(db.Model):
 
 class Reservation(db.Model):
     __tablename__ = 'reservations'
+    __table_args__ = (
+        # At most one open reservation per user, enforced by the database rather than a read-then-write check
+        db.Index('uq_reservations_user_active', 'user_id', unique=True, sqlite_where=db.text('end_time IS NULL')),
+        db.Index('ix_reservations_user_end_time', 'user_id', 'end_time'),
+        db.Index('ix_reservations_spot_end_time', 'spot_id', 'end_time'),
+        # Small index the pending_payment sweeper walks by id instead of scanning every reservation
+        db.Index('ix_reservations_pending_payment', 'id', sqlite_where=db.text("status = 'pending_payment'")),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     spot_id = db.Column(db.Integer, db.ForeignKey('parking_spots.id'), nullable=False) # Changed to spot_id
@@ -113,6 +145,9 @@ class Reservation(db.Model):
 
 class Payment(db.Model):
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index('ix_payments_status_completed_at', 'payment_status', 'completed_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     reservation_id = db.Column(db.Integer, db.ForeignKey('reservations.id'), nullable=True)
@@ -127,6 +162,9 @@ class Payment(db.Model):
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        db.Index('ix_transactions_user_created_at', 'user_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     amount = db.Column(db.Float, nullable=False)
@@ -149,4 +187,19 @@ class SystemStats(db.Model):
     average_occupancy_rate = db.Column(db.Float, default=0.0)
 
     def __repr__(self):
-        return f'<SystemStats {self.date} revenue {self.total_revenue}>'
\ No newline at end of file
+        return f'<SystemStats {self.date} revenue {self.total_revenue}>'
+
+class BookingHourlyStats(db.Model):
+    """Per-lot hourly rollup behind the admin analytics charts, maintained on booking and release."""
+    __tablename__ = 'booking_hourly_stats'
+    # Clustered on (date, hour, lot_id) so a date range reads one contiguous run of rows with no rowid lookups
+    __table_args__ = {'sqlite_with_rowid': False}
+    date = db.Column(db.Date, primary_key=True)
+    hour = db.Column(db.Integer, primary_key=True) # 0-23, UTC like the reservation timestamps
+    lot_id = db.Column(db.Integer, db.ForeignKey('parking_lots.id'), primary_key=True)
+    bookings = db.Column(db.Integer, default=0, nullable=False) # Reservations started in the hour
+    revenue = db.Column(db.Float, default=0.0, nullable=False) # Payments completed in the hour
+    minutes_parked = db.Column(db.Float, default=0.0, nullable=False) # Duration of stays that ended in the hour
+
+    def __repr__(self):
+        return f'<BookingHourlyStats lot {self.lot_id} {self.date} {self.hour:02d}h>'
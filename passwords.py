@@ -0,0 +1,64 @@
+# Parking App V1/passwords.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Defaults, overridden by PASSWORD_HASH_METHOD / PASSWORD_HASH_WORKERS in app.config
+PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+PASSWORD_HASH_WORKERS = 4
+
+class PasswordHasher:
+    """Runs password hashing on a bounded worker pool so a login burst cannot occupy every request thread."""
+
+    def __init__(self, method=PASSWORD_HASH_METHOD, workers=PASSWORD_HASH_WORKERS):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.configure(method, workers)
+
+    def configure(self, method, workers):
+        with self._lock:
+            old_executor = self._executor
+            self.method = method
+            self.workers = workers
+            self._method_prefix = None
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        if old_executor is not None:
+            old_executor.shutdown(wait=False)
+
+    def _run(self, func, *args):
+        """Runs func on the pool and returns (result, milliseconds spent waiting for a worker)."""
+        submitted_at = time.perf_counter()
+
+        def timed():
+            started_at = time.perf_counter()
+            return func(*args), started_at
+
+        result, started_at = self._executor.submit(timed).result()
+        return result, (started_at - submitted_at) * 1000
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)[0]
+
+    def verify(self, password_hash, password):
+        """Returns (matches, queue_ms) for a stored hash and a candidate password."""
+        return self._run(check_password_hash, password_hash, password)
+
+    @property
+    def method_prefix(self):
+        # Werkzeug fills in default parameters (e.g. pbkdf2 iterations), so learn the exact prefix it writes
+        if self._method_prefix is None:
+            self._method_prefix = self.hash('').split('$', 1)[0]
+        return self._method_prefix
+
+    def needs_rehash(self, password_hash):
+        """True when the stored hash was made with a different method or cost than the configured one."""
+        return password_hash.split('$', 1)[0] != self.method_prefix
+
+hasher = PasswordHasher()
+
+def init_password_hasher(app):
+    """Applies the app's hashing method, cost and pool size to the shared hasher."""
+    app.config.setdefault('PASSWORD_HASH_METHOD', PASSWORD_HASH_METHOD)
+    app.config.setdefault('PASSWORD_HASH_WORKERS', PASSWORD_HASH_WORKERS)
+    hasher.configure(app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_HASH_WORKERS'])
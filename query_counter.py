@@ -0,0 +1,84 @@
+# Parking App V1/query_counter.py
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from models.models import db
+
+# Identical statements within one request before it is flagged as a likely N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+# Active count_queries() blocks for the current thread
+_local = threading.local()
+
+class QueryStats:
+    """Statement count, total SQL time and per-statement repeats for one request or block."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.statements = Counter()
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """Statements run at least threshold times, most repeated first."""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+@contextmanager
+def count_queries():
+    """Counts statements run on this thread inside the block, e.g. to assert a route's query budget in tests."""
+    stats = QueryStats()
+    stack = _local.__dict__.setdefault('stack', [])
+    stack.append(stats)
+    try:
+        yield stats
+    finally:
+        stack.remove(stats)
+
+def init_query_counter(app):
+    """Hooks engine events to count queries per request, expose them in debug headers and flag likely N+1s."""
+    app.config.setdefault('SQL_QUERY_HEADERS', None)  # None follows app.debug
+    app.config.setdefault('SQL_N_PLUS_ONE_THRESHOLD', N_PLUS_ONE_THRESHOLD)
+
+    with app.app_context():
+        engine = db.engine
+
+    # The start time lives on the statement's execution context, so a statement that raises (and never
+    # reaches after_cursor_execute) leaves nothing behind on the pooled connection
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        context._query_started_at = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started_at
+        if has_request_context() and 'sql_stats' in g:
+            g.sql_stats.record(statement, elapsed)
+        for stats in getattr(_local, 'stack', ()):
+            stats.record(statement, elapsed)
+
+    @app.before_request
+    def start_query_stats():
+        g.sql_stats = QueryStats()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.get('sql_stats')
+        if stats is None:
+            return response
+
+        for statement, n in stats.repeated(app.config['SQL_N_PLUS_ONE_THRESHOLD']):
+            app.logger.warning("Possible N+1 in %s: statement ran %d times: %s",
+                               request.endpoint, n, " ".join(statement.split())[:200])
+
+        show_headers = app.config['SQL_QUERY_HEADERS']
+        if show_headers or (show_headers is None and app.debug):
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers['X-Query-Time-Ms'] = f"{stats.total_time * 1000:.2f}"
+        return response
@@ -0,0 +1,174 @@
+# Parking App V1/search.py
+import re
+import sqlite3
+from sqlalchemy import event
+from models.models import db, ParkingLot, ParkingSpot
+
+LOT_SEARCH_PAGE_SIZE = 20
+LOT_SEARCH_MAX_PAGE_SIZE = 100
+
+# Spots shown in each lot card's layout preview
+SPOT_PREVIEW_LIMIT = 12
+
+LOT_FEATURES = ('has_security', 'has_lighting', 'is_covered')
+
+# Sort keys accepted by search_lots; id breaks ties so pages never overlap
+LOT_SORTS = {
+    'price': (ParkingLot.price_per_hour.asc(), ParkingLot.id.asc()),
+    'price_desc': (ParkingLot.price_per_hour.desc(), ParkingLot.id.asc()),
+    'name': (ParkingLot.prime_location_name.asc(), ParkingLot.id.asc()),
+    'available': ((ParkingLot.max_spots - ParkingLot.occupied_spots).desc(), ParkingLot.id.asc()),
+}
+
+# External-content FTS5 index over the lot text fields, kept in step with parking_lots by triggers
+LOT_FTS_TABLE = 'parking_lots_fts'
+LOT_FTS_SCHEMA = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {LOT_FTS_TABLE} USING fts5(
+        prime_location_name, address, content='parking_lots', content_rowid='id')""",
+    f"""CREATE TRIGGER IF NOT EXISTS parking_lots_fts_insert AFTER INSERT ON parking_lots BEGIN
+        INSERT INTO {LOT_FTS_TABLE}(rowid, prime_location_name, address)
+        VALUES (new.id, new.prime_location_name, new.address);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS parking_lots_fts_delete AFTER DELETE ON parking_lots BEGIN
+        INSERT INTO {LOT_FTS_TABLE}({LOT_FTS_TABLE}, rowid, prime_location_name, address)
+        VALUES ('delete', old.id, old.prime_location_name, old.address);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS parking_lots_fts_update AFTER UPDATE OF prime_location_name, address ON parking_lots BEGIN
+        INSERT INTO {LOT_FTS_TABLE}({LOT_FTS_TABLE}, rowid, prime_location_name, address)
+        VALUES ('delete', old.id, old.prime_location_name, old.address);
+        INSERT INTO {LOT_FTS_TABLE}(rowid, prime_location_name, address)
+        VALUES (new.id, new.prime_location_name, new.address);
+    END""",
+)
+
+# Engines whose database is known to have the FTS table. Only a positive answer is cached, so an index
+# created after startup is picked up by the next search
+_fts_available = set()
+
+def create_lot_search_index(cursor):
+    """Creates the FTS5 table and triggers on a raw sqlite3 cursor and indexes existing lots.
+
+    Returns False when this SQLite build lacks FTS5; search then falls back to LIKE prefix matching.
+    """
+    try:
+        for statement in LOT_FTS_SCHEMA:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {LOT_FTS_TABLE}({LOT_FTS_TABLE}) VALUES ('rebuild')")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+@event.listens_for(ParkingLot.__table__, 'after_create')
+def create_lot_search_index_with_table(target, connection, **kw):
+    """Builds the search index wherever create_all creates parking_lots (app start, setup script, tests)."""
+    if connection.dialect.name == 'sqlite':
+        create_lot_search_index(connection.connection.cursor())
+
+def lot_fts_available():
+    engine = db.engine
+    if engine.url not in _fts_available:
+        exists = db.session.execute(
+            db.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': LOT_FTS_TABLE}
+        ).scalar()
+        if not exists:
+            return False
+        _fts_available.add(engine.url)
+    return True
+
+def ensure_lot_search_index():
+    """Creates the search index on a database whose parking_lots table predates it; returns whether FTS is usable."""
+    if lot_fts_available():
+        return True
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    connection = db.engine.raw_connection()
+    try:
+        created = create_lot_search_index(connection.cursor())
+        connection.commit()
+    finally:
+        connection.close()
+    return created
+
+def fts_prefix_query(text):
+    """Turns free text into an FTS5 query that requires every word as a prefix, e.g. 'mg ro' -> '"mg"* "ro"*'."""
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+def prefix_range(column, prefix):
+    """Index-friendly prefix match as a half-open string range instead of LIKE."""
+    return db.and_(column >= prefix, column < prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+def search_lots(text=None, pin_code=None, features=(), min_price=None, max_price=None,
+                has_free=False, sort='price', page=1, per_page=LOT_SEARCH_PAGE_SIZE):
+    """Filters, sorts and paginates lots in SQL and returns a Flask-SQLAlchemy Pagination."""
+    query = db.select(ParkingLot)
+
+    if text:
+        if lot_fts_available():
+            match = fts_prefix_query(text)
+            if match:
+                matching_ids = db.select(db.literal_column('rowid')).select_from(db.table(LOT_FTS_TABLE)).where(
+                    db.text(f"{LOT_FTS_TABLE} MATCH :match").bindparams(match=match))
+                query = query.where(ParkingLot.id.in_(matching_ids))
+            else:
+                # Punctuation alone has no words to match, as with the LIKE fallback
+                query = query.where(db.false())
+        else:
+            pattern = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            query = query.where(db.or_(
+                ParkingLot.prime_location_name.ilike(pattern, escape='\\'),
+                ParkingLot.address.ilike(pattern, escape='\\')
+            ))
+    if pin_code:
+        query = query.where(prefix_range(ParkingLot.pin_code, pin_code))
+    for feature in features:
+        if feature in LOT_FEATURES:
+            query = query.where(getattr(ParkingLot, feature).is_(True))
+    if min_price is not None:
+        query = query.where(ParkingLot.price_per_hour >= min_price)
+    if max_price is not None:
+        query = query.where(ParkingLot.price_per_hour <= max_price)
+    if has_free:
+        query = query.where(ParkingLot.occupied_spots < ParkingLot.max_spots)
+
+    query = query.order_by(*LOT_SORTS.get(sort, LOT_SORTS['price']))
+    per_page = max(1, min(per_page, LOT_SEARCH_MAX_PAGE_SIZE))
+    return db.paginate(query, page=page, per_page=per_page, error_out=False)
+
+def search_args(args):
+    """Reads search_lots keyword arguments from request args; invalid numbers are ignored."""
+    def number(name, cast):
+        try:
+            return cast(args[name]) if args.get(name, '').strip() else None
+        except ValueError:
+            return None
+
+    return {
+        'text': args.get('q', '').strip() or None,
+        'pin_code': args.get('pin_code', '').strip() or None,
+        'features': [feature for feature in LOT_FEATURES if args.get(feature)],
+        'min_price': number('min_price', float),
+        'max_price': number('max_price', float),
+        'has_free': bool(args.get('has_free')),
+        'sort': args.get('sort', 'price'),
+        'page': number('page', int) or 1,
+        'per_page': number('per_page', int) or LOT_SEARCH_PAGE_SIZE,
+    }
+
+def preview_spots(lots, limit=SPOT_PREVIEW_LIMIT):
+    """Returns {lot_id: first spots by id} for the lot cards in one windowed query."""
+    lot_ids = [lot.id for lot in lots]
+    if not lot_ids:
+        return {}
+
+    position = db.func.row_number().over(partition_by=ParkingSpot.lot_id, order_by=ParkingSpot.id).label('position')
+    ranked = db.select(ParkingSpot.id, position).where(ParkingSpot.lot_id.in_(lot_ids)).subquery()
+    spots = ParkingSpot.query.join(ranked, ranked.c.id == ParkingSpot.id).filter(
+        ranked.c.position <= limit
+    ).order_by(ParkingSpot.id).all()
+
+    previews = {lot_id: [] for lot_id in lot_ids}
+    for spot in spots:
+        previews[spot.lot_id].append(spot)
+    return previews
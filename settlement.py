@@ -0,0 +1,134 @@
+# Parking App V1/settlement.py
+import random
+import threading
+import time
+from models.models import db, Transaction
+from utils import credit_balance
+from jobs import jobs
+from metrics import register, Counter
+
+# Defaults, overridden by SETTLEMENT_BATCH_SIZE / SETTLEMENT_INTERVAL in app.config
+SETTLEMENT_BATCH_SIZE = 100
+SETTLEMENT_INTERVAL = 60
+
+SETTLEMENT_JOB = 'settle_withdrawals'
+
+WITHDRAWALS_SETTLED = register(Counter(
+    'parking_withdrawals_settled_total', "Bank withdrawals moved out of pending, by outcome.",
+    ('outcome',)))
+
+class FakeBank:
+    """Local stand-in for the payout provider.
+
+    Transfers are keyed by reference id and the first outcome is remembered, so retrying a transfer that
+    already went through never pays twice - the same guarantee a real provider's idempotency key gives.
+    """
+
+    def __init__(self, failure_rate=0.0, latency=0.0, seed=None):
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self._rng = random.Random(seed)
+        self._outcomes = {}
+        self._lock = threading.Lock()
+
+    def transfer(self, reference_id, amount):
+        """Pays amount out for the reference id and returns True on success, False if the bank rejected it."""
+        with self._lock:
+            if reference_id in self._outcomes:
+                return self._outcomes[reference_id]
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            return self._outcomes.setdefault(reference_id, self._rng.random() >= self.failure_rate)
+
+    def transfers(self):
+        with self._lock:
+            return dict(self._outcomes)
+
+class Settlement:
+    """Settles pending bank withdrawals in batches on the background job queue."""
+
+    def __init__(self, bank=None, batch_size=SETTLEMENT_BATCH_SIZE):
+        self.bank = bank or FakeBank()
+        self.batch_size = batch_size
+        # Runs are serialised so two workers never ask the bank about the same batch at once
+        self._run_lock = threading.Lock()
+
+    def configure(self, bank, batch_size):
+        self.bank = bank
+        self.batch_size = batch_size
+
+    def claim_batch(self):
+        """Moves up to batch_size withdrawals to 'processing' and commits; returns their id, user, amount and reference.
+
+        Rows a stopped run left in 'processing' are claimed again. The bank call is idempotent by reference id
+        and only one run can move a row out of 'processing', so taking them over never pays or refunds twice.
+        """
+        batch = db.select(Transaction.id).where(
+            Transaction.status.in_(('pending', 'processing')),
+            Transaction.type == 'debit',
+            Transaction.payment_method == 'bank_transfer'
+        ).order_by(Transaction.id).limit(self.batch_size)
+        claimed = db.session.execute(
+            db.update(Transaction)
+            .where(Transaction.id.in_(batch.scalar_subquery()))
+            .values(status='processing')
+            .returning(Transaction.id, Transaction.user_id, Transaction.amount, Transaction.reference_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.session.commit()
+        return sorted(claimed)
+
+    def settle_batch(self):
+        """Settles up to batch_size pending withdrawals; returns (settled, failed, picked up).
+
+        The batch is claimed in one short commit and the outcomes are recorded in another. The bank is called
+        in between with no transaction open, so a slow bank never holds SQLite's write lock.
+        """
+        claimed = self.claim_batch()
+        outcomes = [(row, self.bank.transfer(row.reference_id or f"TXN_{row.id}", row.amount)) for row in claimed]
+
+        settled, failed = [], []
+        for (transaction_id, user_id, amount, _), outcome in outcomes:
+            # Only the run that moves the row out of 'processing' acts on it, so replays are harmless
+            result = db.session.execute(
+                db.update(Transaction)
+                .where(Transaction.id == transaction_id, Transaction.status == 'processing')
+                .values(status='completed' if outcome else 'failed')
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != 1:
+                continue
+            if outcome:
+                settled.append(transaction_id)
+            else:
+                credit_balance(user_id, amount)
+                failed.append(transaction_id)
+
+        db.session.commit()
+        WITHDRAWALS_SETTLED.inc(('completed',), len(settled))
+        WITHDRAWALS_SETTLED.inc(('failed',), len(failed))
+        return len(settled), len(failed), len(claimed)
+
+    def run(self):
+        """Drains every pending withdrawal, one batch per commit."""
+        with self._run_lock:
+            while True:
+                _, _, picked_up = self.settle_batch()
+                if picked_up < self.batch_size:
+                    return
+
+settlement = Settlement()
+
+def enqueue_settlement():
+    """Asks a background worker to settle pending withdrawals; returns immediately."""
+    return jobs.submit(SETTLEMENT_JOB, settlement.run)
+
+def init_settlement(app):
+    """Applies the app's payout bank and batch size and schedules a periodic settlement run."""
+    app.config.setdefault('SETTLEMENT_BANK', FakeBank())
+    app.config.setdefault('SETTLEMENT_BATCH_SIZE', SETTLEMENT_BATCH_SIZE)
+    app.config.setdefault('SETTLEMENT_INTERVAL', SETTLEMENT_INTERVAL)
+    settlement.configure(app.config['SETTLEMENT_BANK'], app.config['SETTLEMENT_BATCH_SIZE'])
+    # Catches withdrawals left pending by a restart or a failed run
+    jobs.schedule(SETTLEMENT_JOB, settlement.run, app.config['SETTLEMENT_INTERVAL'])
@@ -0,0 +1,192 @@
+# Parking App V1/stats.py
+from datetime import date
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models.models import db, SystemStats, BookingHourlyStats, ParkingLot, ParkingSpot, Payment, Reservation
+from archive import ARCHIVE_TABLES, with_archive
+
+def bump_daily_stats(day, revenue=0.0, reservations=0):
+    """Adds to the SystemStats row for the day, creating it if needed. Caller commits."""
+    stmt = sqlite_insert(SystemStats).values(
+        date=day,
+        total_revenue=revenue,
+        total_reservations=reservations
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['date'],
+        set_={
+            'total_revenue': SystemStats.total_revenue + stmt.excluded.total_revenue,
+            'total_reservations': SystemStats.total_reservations + stmt.excluded.total_reservations
+        }
+    )
+    db.session.execute(stmt)
+
+def add_hourly(buckets, lot_id, moment, bookings=0, revenue=0.0, minutes_parked=0.0):
+    """Accumulates one event into a {(lot_id, date, hour): [bookings, revenue, minutes_parked]} dict."""
+    bucket = buckets.setdefault((lot_id, moment.date(), moment.hour), [0, 0.0, 0.0])
+    bucket[0] += bookings
+    bucket[1] += revenue
+    bucket[2] += minutes_parked
+    return buckets
+
+def bump_hourly_stats(buckets):
+    """Adds accumulated buckets from add_hourly to BookingHourlyStats with one upsert executemany. Caller commits."""
+    if not buckets:
+        return
+    stmt = sqlite_insert(BookingHourlyStats)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['date', 'hour', 'lot_id'],
+        set_={
+            'bookings': BookingHourlyStats.bookings + stmt.excluded.bookings,
+            'revenue': BookingHourlyStats.revenue + stmt.excluded.revenue,
+            'minutes_parked': BookingHourlyStats.minutes_parked + stmt.excluded.minutes_parked
+        }
+    )
+    db.session.execute(stmt, [
+        {'lot_id': lot_id, 'date': day, 'hour': hour,
+         'bookings': bookings, 'revenue': revenue, 'minutes_parked': minutes_parked}
+        for (lot_id, day, hour), (bookings, revenue, minutes_parked) in buckets.items()
+    ])
+
+def record_reservation(reservation, lot_id):
+    """Counts a newly created reservation towards its start day and its lot's start hour."""
+    bump_daily_stats(reservation.start_time.date(), reservations=1)
+    bump_hourly_stats(add_hourly({}, lot_id, reservation.start_time, bookings=1))
+
+def record_checkout(buckets, lot_id, reservation, paid):
+    """Adds a released stay to hourly buckets: its minutes parked, plus its cost when it was paid."""
+    return add_hourly(buckets, lot_id, reservation.end_time,
+                      revenue=reservation.cost if paid else 0.0,
+                      minutes_parked=reservation.duration_hours() * 60)
+
+def backfill_system_stats():
+    """Rebuilds every SystemStats row from the raw payments and reservations tables, archive included. Caller commits."""
+    payments = with_archive(Payment, ('amount', 'completed_at'),
+                            lambda c: db.and_(c.payment_status == 'completed', c.completed_at.isnot(None)))
+    revenue_by_day = db.session.query(
+        db.func.date(payments.c.completed_at),
+        db.func.sum(payments.c.amount)
+    ).group_by(db.func.date(payments.c.completed_at)).all()
+
+    reservations = with_archive(Reservation, ('id', 'start_time'))
+    reservations_by_day = db.session.query(
+        db.func.date(reservations.c.start_time),
+        db.func.count(reservations.c.id)
+    ).group_by(db.func.date(reservations.c.start_time)).all()
+
+    db.session.query(SystemStats).delete()
+    db.session.flush()
+
+    for day, revenue in revenue_by_day:
+        bump_daily_stats(date.fromisoformat(day), revenue=revenue or 0.0)
+    for day, count in reservations_by_day:
+        bump_daily_stats(date.fromisoformat(day), reservations=count)
+
+    return len({day for day, _ in revenue_by_day} | {day for day, _ in reservations_by_day})
+
+def backfill_hourly_stats():
+    """Rebuilds every BookingHourlyStats row from reservations and payments, archive included. Caller commits.
+
+    The buckets are summed and inserted by one INSERT ... SELECT, so no rows are pulled into Python. Stays
+    whose spot no longer exists are skipped, since their lot cannot be recovered. Returns the buckets written.
+    """
+    reservations = with_archive(Reservation, ('spot_id', 'start_time', 'end_time'))
+    payments = with_archive(Payment, ('reservation_id', 'amount', 'completed_at'),
+                            lambda c: db.and_(c.payment_status == 'completed', c.completed_at.isnot(None)))
+    spots = ParkingSpot.__table__
+    # A payment's reservation may be live or archived; both lookups are by primary key
+    live = Reservation.__table__.alias('live_reservations')
+    archived = ARCHIVE_TABLES[Reservation].alias('archived_reservations')
+
+    def events(moment, bookings=db.literal(0), revenue=db.literal(0.0), minutes_parked=db.literal(0.0)):
+        """One row per event, shaped like a BookingHourlyStats bucket."""
+        return db.select(
+            spots.c.lot_id, db.func.date(moment).label('date'),
+            db.cast(db.func.strftime('%H', moment), db.Integer).label('hour'),
+            bookings.label('bookings'), revenue.label('revenue'), minutes_parked.label('minutes_parked'))
+
+    minutes = (db.func.julianday(reservations.c.end_time) - db.func.julianday(reservations.c.start_time)) * 1440
+    started = events(reservations.c.start_time, bookings=db.literal(1)).join(
+        spots, spots.c.id == reservations.c.spot_id)
+    ended = events(reservations.c.end_time, minutes_parked=minutes).join(
+        spots, spots.c.id == reservations.c.spot_id).where(reservations.c.end_time.isnot(None))
+    paid = events(payments.c.completed_at, revenue=payments.c.amount).select_from(
+        payments.outerjoin(live, live.c.id == payments.c.reservation_id)
+        .outerjoin(archived, archived.c.id == payments.c.reservation_id)
+        .join(spots, spots.c.id == db.func.coalesce(live.c.spot_id, archived.c.spot_id)))
+
+    rows = db.union_all(started, ended, paid).subquery()
+    totals = db.select(
+        rows.c.date, rows.c.hour, rows.c.lot_id, db.func.sum(rows.c.bookings),
+        db.func.sum(rows.c.revenue), db.func.sum(rows.c.minutes_parked)
+    ).group_by(rows.c.date, rows.c.hour, rows.c.lot_id)
+
+    db.session.query(BookingHourlyStats).delete()
+    result = db.session.execute(BookingHourlyStats.__table__.insert().from_select(
+        ['date', 'hour', 'lot_id', 'bookings', 'revenue', 'minutes_parked'], totals))
+    return result.rowcount
+
+def backfill_missing_stats():
+    """Backfills SystemStats and BookingHourlyStats when a rollup is empty but there is history to count.
+
+    The rollups are only bumped as bookings and payments happen, so a database that predates them would
+    otherwise report zero revenue and bookings. Returns the names of the rollups rebuilt. Caller commits.
+    """
+    history = db.session.query(with_archive(Reservation, ('id',))).limit(1).first()
+    if history is None:
+        return []
+    rebuilt = []
+    if db.session.query(SystemStats.id).limit(1).first() is None:
+        backfill_system_stats()
+        rebuilt.append(SystemStats.__tablename__)
+    if db.session.query(BookingHourlyStats.lot_id).limit(1).first() is None:
+        backfill_hourly_stats()
+        rebuilt.append(BookingHourlyStats.__tablename__)
+    return rebuilt
+
+def hourly_stats_filter(start_date, end_date, lot_id=None):
+    criteria = [BookingHourlyStats.date >= start_date, BookingHourlyStats.date <= end_date]
+    if lot_id is not None:
+        criteria.append(BookingHourlyStats.lot_id == lot_id)
+    return criteria
+
+def daily_booking_stats(start_date, end_date, lot_id=None):
+    """Returns (date, bookings, revenue) per day, oldest first, for all lots or for one lot."""
+    if lot_id is None:
+        # SystemStats already holds the all-lots totals per day with the same day boundaries
+        return [(row.date, row.total_reservations, row.total_revenue) for row in daily_stats(start_date, end_date)]
+    return db.session.query(
+        BookingHourlyStats.date,
+        db.func.sum(BookingHourlyStats.bookings),
+        db.func.sum(BookingHourlyStats.revenue)
+    ).filter(*hourly_stats_filter(start_date, end_date, lot_id)).group_by(
+        BookingHourlyStats.date
+    ).order_by(BookingHourlyStats.date).all()
+
+def peak_hours(start_date, end_date, lot_id=None):
+    """Returns (hour, bookings) for every hour of the day that saw bookings in the range."""
+    return db.session.query(
+        BookingHourlyStats.hour,
+        db.func.sum(BookingHourlyStats.bookings)
+    ).filter(*hourly_stats_filter(start_date, end_date, lot_id)).group_by(
+        BookingHourlyStats.hour
+    ).order_by(BookingHourlyStats.hour).all()
+
+def lot_breakdown(start_date, end_date):
+    """Returns per-lot (lot_id, name, bookings, revenue, minutes_parked) over the range, busiest first."""
+    # Aggregate first so lot names are joined once per lot rather than once per bucket
+    totals = db.session.query(
+        BookingHourlyStats.lot_id,
+        db.func.sum(BookingHourlyStats.bookings).label('bookings'),
+        db.func.sum(BookingHourlyStats.revenue).label('revenue'),
+        db.func.sum(BookingHourlyStats.minutes_parked).label('minutes_parked')
+    ).filter(*hourly_stats_filter(start_date, end_date)).group_by(BookingHourlyStats.lot_id).subquery()
+    return db.session.query(
+        totals.c.lot_id, ParkingLot.prime_location_name, totals.c.bookings, totals.c.revenue, totals.c.minutes_parked
+    ).outerjoin(ParkingLot, ParkingLot.id == totals.c.lot_id).order_by(totals.c.bookings.desc()).all()
+
+def daily_stats(start_date, end_date):
+    """Returns the SystemStats rows between two dates, oldest first."""
+    return SystemStats.query.filter(
+        SystemStats.date >= start_date,
+        SystemStats.date <= end_date
+    ).order_by(SystemStats.date).all()
@@ -0,0 +1,125 @@
+# Parking App V1/sweeper.py
+from datetime import datetime
+from models.models import db, User, ParkingLot, ParkingSpot, Reservation
+from checkout import payment_records, insert_checkout_records
+from stats import bump_daily_stats, bump_hourly_stats, add_hourly
+from jobs import jobs
+from metrics import register, Counter
+
+# Defaults, overridden by PENDING_PAYMENT_BATCH_SIZE / PENDING_PAYMENT_SWEEP_INTERVAL in app.config
+PENDING_PAYMENT_BATCH_SIZE = 500
+PENDING_PAYMENT_SWEEP_INTERVAL = 300
+
+SWEEP_JOB = 'sweep_pending_payments'
+
+PENDING_PAYMENTS_SWEPT = register(Counter(
+    'parking_pending_payments_swept_total', "pending_payment reservations examined by the sweeper, by outcome.",
+    ('outcome',)))
+
+class PendingPaymentSweeper:
+    """Retries the wallet charge for reservations left pending_payment, a batch at a time."""
+
+    def __init__(self, batch_size=PENDING_PAYMENT_BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def sweep_batch(self, after_id=0, user_id=None):
+        """Charges the next batch of pending_payment reservations with id > after_id, with one commit.
+
+        Returns (charged, picked up, last id seen) so the caller can continue from the last id.
+        """
+        query = db.session.query(
+            Reservation.id, Reservation.user_id, Reservation.cost, ParkingLot.id.label('lot_id'), ParkingLot.prime_location_name
+        ).join(
+            ParkingSpot, Reservation.spot_id == ParkingSpot.id
+        ).join(
+            ParkingLot, ParkingSpot.lot_id == ParkingLot.id
+        ).filter(
+            Reservation.status == 'pending_payment',
+            Reservation.id > after_id
+        )
+        if user_id is not None:
+            query = query.filter(Reservation.user_id == user_id)
+        pending = query.order_by(Reservation.id).limit(self.batch_size).all()
+        if not pending:
+            return 0, 0, after_id
+
+        # Only the sweep that moves a reservation out of pending_payment charges it. Claiming first also
+        # takes SQLite's write lock, so the balances read next cannot change before the commit
+        claimed = set(db.session.execute(
+            db.update(Reservation)
+            .where(Reservation.id.in_([row.id for row in pending]), Reservation.status == 'pending_payment')
+            .values(status='completed')
+            .returning(Reservation.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+        balances = dict(db.session.query(User.id, User.balance).filter(
+            User.id.in_({row.user_id for row in pending})))
+
+        paid_at = datetime.utcnow()
+        records, unpaid, charges, hourly = [], [], {}, {}
+        for reservation_id, owner_id, cost, lot_id, lot_name in pending:
+            if reservation_id not in claimed:
+                continue
+            cost = cost or 0.0
+            if balances.get(owner_id, 0.0) < cost:
+                unpaid.append(reservation_id)
+                continue
+            balances[owner_id] -= cost
+            charges[owner_id] = charges.get(owner_id, 0.0) + cost
+            records.append(payment_records(owner_id, reservation_id, cost, paid_at, lot_name))
+            add_hourly(hourly, lot_id, paid_at, revenue=cost)
+
+        if unpaid:
+            db.session.execute(
+                db.update(Reservation)
+                .where(Reservation.id.in_(unpaid))
+                .values(status='pending_payment')
+                .execution_options(synchronize_session=False)
+            )
+        if charges:
+            users = User.__table__
+            db.session.execute(
+                users.update()
+                .where(users.c.id == db.bindparam('owner_id'))
+                .values(balance=users.c.balance - db.bindparam('charge')),
+                [{'owner_id': owner_id, 'charge': charge} for owner_id, charge in charges.items()]
+            )
+
+        insert_checkout_records(records)
+        bump_hourly_stats(hourly)
+        revenue = sum(payment['amount'] for payment, _ in records)
+        if revenue:
+            bump_daily_stats(paid_at.date(), revenue=revenue)
+        db.session.commit()
+
+        PENDING_PAYMENTS_SWEPT.inc(('charged',), len(records))
+        PENDING_PAYMENTS_SWEPT.inc(('insufficient_balance',), len(unpaid))
+        return len(records), len(pending), pending[-1].id
+
+    def run(self, user_id=None):
+        """Walks every pending_payment reservation (or one user's) in id order, one batch per commit."""
+        after_id = 0
+        while True:
+            _, picked_up, after_id = self.sweep_batch(after_id, user_id)
+            if picked_up < self.batch_size:
+                return
+
+sweeper = PendingPaymentSweeper()
+
+def pending_payment_backlog():
+    """Returns (count, amount) of reservations still waiting for payment."""
+    count, amount = db.session.query(
+        db.func.count(Reservation.id), db.func.coalesce(db.func.sum(Reservation.cost), 0.0)
+    ).filter(Reservation.status == 'pending_payment').one()
+    return count, amount
+
+def enqueue_pending_payment_sweep(user_id=None):
+    """Asks a background worker to retry pending charges, for one user after a top-up or for everyone."""
+    return jobs.submit(SWEEP_JOB, sweeper.run, user_id)
+
+def init_pending_payment_sweeper(app):
+    """Applies the app's batch size and schedules a periodic sweep over every user."""
+    app.config.setdefault('PENDING_PAYMENT_BATCH_SIZE', PENDING_PAYMENT_BATCH_SIZE)
+    app.config.setdefault('PENDING_PAYMENT_SWEEP_INTERVAL', PENDING_PAYMENT_SWEEP_INTERVAL)
+    sweeper.batch_size = app.config['PENDING_PAYMENT_BATCH_SIZE']
+    jobs.schedule(SWEEP_JOB, sweeper.run, app.config['PENDING_PAYMENT_SWEEP_INTERVAL'])
@@ -0,0 +1,244 @@
+# Parking App V1/synthetic_data.py
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from models.models import db, User, ParkingLot, ParkingSpot, Reservation, Payment, Transaction
+from passwords import hasher
+from utils import insert_spots
+
+SYNTHETIC_USER_PREFIX = 'synth_user'
+SYNTHETIC_PASSWORD = 'synthetic123'
+
+# Rows per executemany round-trip
+INSERT_BATCH_SIZE = 10000
+
+# Relative booking volume per hour of day: quiet nights, a morning commute peak and a broader evening peak
+HOURLY_WEIGHTS = (1, 1, 1, 1, 1, 2, 4, 8, 12, 10, 7, 6, 7, 6, 5, 6, 8, 11, 12, 9, 6, 4, 2, 1)
+
+# Relative booking volume per weekday, Monday first
+WEEKDAY_WEIGHTS = (1.1, 1.1, 1.1, 1.1, 1.2, 0.8, 0.6)
+
+AREAS = ('MG Road', 'Indiranagar', 'Koramangala', 'Whitefield', 'Jayanagar', 'Malleshwaram', 'HSR Layout',
+         'Electronic City', 'Hebbal', 'Yelahanka', 'Banashankari', 'Marathahalli', 'BTM Layout', 'Rajajinagar')
+PLACES = ('Mall', 'Metro Station', 'Tech Park', 'Market', 'Hospital', 'Stadium', 'Airport Link', 'Plaza')
+
+class BatchInserter:
+    """Buffers rows for one table and writes them with executemany in fixed-size batches."""
+
+    def __init__(self, model, batch_size=INSERT_BATCH_SIZE):
+        self.table = model.__table__
+        self.batch_size = batch_size
+        self.rows = []
+        self.count = 0
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            db.session.execute(self.table.insert(), self.rows)
+            self.count += len(self.rows)
+            self.rows = []
+
+def spread(total, weights):
+    """Splits total into integer parts proportional to weights, summing exactly to total."""
+    weight_sum = sum(weights)
+    parts = [math.floor(total * weight / weight_sum) for weight in weights]
+    for index in sorted(range(len(weights)), key=lambda i: -weights[i])[:total - sum(parts)]:
+        parts[index] += 1
+    return parts
+
+def generate_lots(rng, count):
+    for i in range(count):
+        rows = rng.randint(2, 20)
+        cols = rng.randint(5, 25)
+        lot = ParkingLot(
+            prime_location_name=f"{rng.choice(AREAS)} {rng.choice(PLACES)} {i + 1}",
+            address=f"{rng.randint(1, 999)}, {rng.choice(AREAS)} Main Road",
+            pin_code=str(560001 + rng.randint(0, 120)),
+            price_per_hour=float(rng.choice((10, 20, 30, 40, 50, 60, 80, 100))),
+            layout_rows=rows,
+            layout_cols=cols,
+            max_spots=rows * cols,
+            max_parking_limit=max(100, rows * cols),
+            has_security=rng.random() < 0.6,
+            has_lighting=rng.random() < 0.8,
+            is_covered=rng.random() < 0.4
+        )
+        db.session.add(lot)
+        db.session.flush()
+        insert_spots(lot.id, ((row, col) for row in range(rows) for col in range(cols)))
+    db.session.commit()
+
+def generate_users(rng, count, first_index):
+    password_hash = hasher.hash(SYNTHETIC_PASSWORD)
+    users = BatchInserter(User)
+    for i in range(first_index, first_index + count):
+        users.add({
+            'username': f'{SYNTHETIC_USER_PREFIX}{i}',
+            'email': f'{SYNTHETIC_USER_PREFIX}{i}@synthetic.test',
+            'password': password_hash,
+            'full_name': f'Synthetic User {i}',
+            'phone': f'9{rng.randint(100000000, 999999999)}',
+            'role': 'user',
+            'balance': round(rng.uniform(0, 5000), 2),
+            'vehicle_number': f'KA{rng.randint(1, 53):02d}{chr(65 + rng.randint(0, 25))}{rng.randint(1000, 9999)}',
+            'vehicle_type': rng.choices(('car', 'bike', 'suv'), (6, 3, 1))[0]
+        })
+    users.flush()
+    db.session.commit()
+
+def generate_history(rng, reservation_count, days, user_ids, spots, prices, history_end):
+    """Streams reservations day by day, oldest first, with their payments and wallet transactions."""
+    reservations = BatchInserter(Reservation)
+    payments = BatchInserter(Payment)
+    transactions = BatchInserter(Transaction)
+
+    next_reservation_id = (db.session.query(db.func.max(Reservation.id)).scalar() or 0) + 1
+    first_day = (history_end - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    day_weights = [WEEKDAY_WEIGHTS[(first_day + timedelta(days=d)).weekday()] for d in range(days)]
+    user_count = len(user_ids)
+    spot_count = len(spots)
+
+    for day_index, day_total in enumerate(spread(reservation_count, day_weights)):
+        day_start = first_day + timedelta(days=day_index)
+        for hour, hour_total in enumerate(spread(day_total, HOURLY_WEIGHTS)):
+            offsets = sorted(rng.random() * 3600 for _ in range(hour_total))
+            for offset in offsets:
+                start_time = day_start + timedelta(hours=hour, seconds=offset)
+                # Median stay of about 1.6 hours with a long tail, capped at a day
+                end_time = start_time + timedelta(hours=min(24.0, rng.lognormvariate(0.5, 0.8)))
+                if end_time >= history_end:
+                    continue
+
+                # Squaring skews bookings towards a core of frequent commuters and busy spots
+                user_id = user_ids[int(user_count * rng.random() ** 2)]
+                spot_id, lot_id = spots[int(spot_count * rng.random() ** 1.5)]
+                cost = round((end_time - start_time).total_seconds() / 3600 * prices[lot_id], 2)
+                reservation_id = next_reservation_id
+                next_reservation_id += 1
+                status = 'pending_payment' if rng.random() < 0.01 else 'completed'
+
+                reservations.add({
+                    'id': reservation_id,
+                    'user_id': user_id,
+                    'spot_id': spot_id,
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'cost': cost,
+                    'status': status,
+                    'vehicle_number': None
+                })
+                if status != 'completed':
+                    continue
+
+                payments.add({
+                    'user_id': user_id,
+                    'reservation_id': reservation_id,
+                    'amount': cost,
+                    'payment_date': end_time,
+                    'payment_method': 'wallet',
+                    'payment_status': 'completed',
+                    'completed_at': end_time
+                })
+                transactions.add({
+                    'user_id': user_id,
+                    'amount': cost,
+                    'type': 'debit',
+                    'created_at': end_time,
+                    'description': f"Payment for reservation {reservation_id}",
+                    'reference_id': f"SYN_DEBIT_{reservation_id}",
+                    'payment_method': 'wallet',
+                    'status': 'completed'
+                })
+                # Roughly one wallet top-up for every four paid stays
+                if rng.random() < 0.25:
+                    transactions.add({
+                        'user_id': user_id,
+                        'amount': float(rng.choice((100, 200, 500, 1000, 2000))),
+                        'type': 'credit',
+                        'created_at': start_time - timedelta(minutes=rng.randint(5, 600)),
+                        'description': "Money added via Upi",
+                        'reference_id': f"SYN_CREDIT_{reservation_id}",
+                        'payment_method': 'upi',
+                        'status': 'completed'
+                    })
+
+        # Committing weekly keeps the WAL bounded without paying for a commit every day
+        if day_index % 7 == 6:
+            db.session.commit()
+
+    reservations.flush()
+    payments.flush()
+    transactions.flush()
+    db.session.commit()
+    return reservations.count, payments.count, transactions.count
+
+def generate_active_reservations(rng, user_ids, history_end):
+    """Parks a car for about 2% of users so dashboards and occupancy have live data."""
+    free_spots = [spot_id for (spot_id,) in db.session.query(ParkingSpot.id).filter_by(status='A')]
+    busy_users = {user_id for (user_id,) in db.session.query(Reservation.user_id).filter(Reservation.end_time.is_(None))}
+    candidates = [user_id for user_id in user_ids if user_id not in busy_users]
+    count = min(len(free_spots), len(candidates), max(1, len(user_ids) // 50))
+
+    reservations = BatchInserter(Reservation)
+    occupied = rng.sample(free_spots, count)
+    for user_id, spot_id in zip(rng.sample(candidates, count), occupied):
+        reservations.add({
+            'user_id': user_id,
+            'spot_id': spot_id,
+            'start_time': history_end - timedelta(minutes=rng.randint(5, 480)),
+            'end_time': None,
+            'cost': None,
+            'status': 'active',
+            'vehicle_number': None
+        })
+    reservations.flush()
+    for start in range(0, len(occupied), 500):
+        ParkingSpot.query.filter(ParkingSpot.id.in_(occupied[start:start + 500])).update(
+            {'status': 'O'}, synchronize_session=False)
+    db.session.commit()
+    return count
+
+def generate_synthetic_data(lots, users, reservations, seed=42, days=180, end_date=None):
+    """Bulk-loads deterministic lots, spots, users, reservations, payments and transactions for load testing.
+
+    History runs up to midnight UTC at the start of end_date, today by default. The same seed and end_date
+    give the same rows on any day; only the salt of the shared password hash differs between runs.
+    """
+    rng = random.Random(seed)
+    history_end = datetime.combine(end_date or datetime.utcnow().date(), datetime.min.time())
+    started = time.perf_counter()
+
+    existing_users = User.query.filter(User.username.like(f'{SYNTHETIC_USER_PREFIX}%')).count()
+
+    print(f"🏗️  Generating {lots} lots...")
+    generate_lots(rng, lots)
+
+    print(f"👥 Generating {users} users...")
+    generate_users(rng, users, existing_users)
+
+    user_ids = [user_id for (user_id,) in db.session.query(User.id).filter(
+        User.username.like(f'{SYNTHETIC_USER_PREFIX}%')).order_by(User.id)]
+    spots = db.session.query(ParkingSpot.id, ParkingSpot.lot_id).order_by(ParkingSpot.id).all()
+    prices = dict(db.session.query(ParkingLot.id, ParkingLot.price_per_hour))
+    if not user_ids or not spots:
+        print("❌ Synthetic history needs at least one lot and one user")
+        return
+
+    print(f"🚗 Generating {reservations} reservations over {days} days...")
+    reservation_rows, payment_rows, transaction_rows = generate_history(
+        rng, reservations, days, user_ids, spots, prices, history_end)
+    active = generate_active_reservations(rng, user_ids, history_end)
+
+    # Keep derived data in step with the bulk-loaded rows
+    ParkingLot.rebuild_occupancy_counts()
+    db.session.commit()
+
+    elapsed = time.perf_counter() - started
+    total_rows = reservation_rows + payment_rows + transaction_rows + active
+    print(f"✅ Inserted {reservation_rows + active} reservations, {payment_rows} payments and "
+          f"{transaction_rows} transactions in {elapsed:.1f}s ({total_rows / elapsed:,.0f} rows/s)")
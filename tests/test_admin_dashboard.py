@@ -0,0 +1,47 @@
+# Parking App V1/tests/test_admin_dashboard.py
+from models.models import ParkingLot
+from booking import book_spot_for_user
+from query_counter import count_queries
+from utils import build_spot_grids
+
+def dashboard_queries(client):
+    with count_queries() as stats:
+        response = client.get('/admin/dashboard')
+    assert response.status_code == 200
+    return stats.count
+
+def book(users, lot):
+    for user in users:
+        book_spot_for_user(user, lot)
+
+def test_dashboard_query_count_does_not_grow_with_lots_or_spots(make_lot, make_user, login):
+    make_user('admin', role='admin')
+    client = login('admin')
+
+    lot = make_lot(rows=2, cols=2)
+    book([make_user('driver0', balance=100)], lot)
+    # The first request pays one-off setup costs, so measure from the second
+    client.get('/admin/dashboard')
+    small = dashboard_queries(client)
+
+    for i in range(5):
+        lot = make_lot(rows=10, cols=10, name=f'Lot {i}')
+        book([make_user(f'driver{i}-{j}', balance=100) for j in range(3)], lot)
+    large = dashboard_queries(client)
+
+    assert large == small
+
+def test_spot_grids_are_built_in_a_fixed_number_of_queries(make_lot, make_user):
+    for i in range(4):
+        lot = make_lot(rows=5, cols=8, name=f'Lot {i}')
+        book([make_user(f'driver{i}', balance=100)], lot)
+    lots = ParkingLot.query.all()
+
+    with count_queries() as stats:
+        grids = build_spot_grids(lots)
+
+    assert stats.count <= 2
+    for lot in lots:
+        cells = [cell for row in grids[lot.id] for cell in row]
+        assert len(cells) == lot.max_spots
+        assert sum(1 for cell in cells if cell['spot'].status == 'O') == 1
@@ -0,0 +1,73 @@
+# Parking App V1/tests/test_archive.py
+from datetime import datetime, timedelta
+from models.models import db, Transaction
+from archive import ARCHIVE_TABLES, archive_old_records
+from utils import create_transaction, wallet_totals, wallet_transactions_page
+
+def add_old_credit(user_id, amount, age_days=100):
+    transaction = create_transaction(user_id, amount, 'credit', 'Money added to wallet', payment_method='upi')
+    transaction.created_at = datetime.utcnow() - timedelta(days=age_days)
+    db.session.commit()
+    return transaction.id
+
+def archived_amounts():
+    archive = ARCHIVE_TABLES[Transaction]
+    return dict(db.session.execute(db.select(archive.c.id, archive.c.amount)).all())
+
+def test_archived_ids_are_never_handed_out_again(make_user):
+    user_id = make_user('driver').id
+    for amount in (10, 20, 30):
+        add_old_credit(user_id, amount)
+
+    assert archive_old_records()['transactions'] == 2
+    newest_id = add_old_credit(user_id, 40)
+    assert newest_id not in archived_amounts()
+
+    assert archive_old_records()['transactions'] == 1
+
+    assert archived_amounts() == {1: 10, 2: 20, 3: 30}
+    assert [t.amount for t in Transaction.query] == [40]
+    assert wallet_totals(user_id) == (0, 100, 4)
+
+def test_rows_copied_but_not_yet_deleted_are_read_once(make_user, login):
+    user_id = make_user('driver').id
+    make_user('admin', role='admin')
+    for amount in (10, 20, 30):
+        add_old_credit(user_id, amount)
+    # What a crash between archive_batch's copy commit and its delete commit leaves behind
+    live, archive = Transaction.__table__, ARCHIVE_TABLES[Transaction]
+    db.session.execute(archive.insert().from_select(
+        [column.name for column in live.columns], db.select(live).where(live.c.id < 3)))
+    db.session.commit()
+
+    assert wallet_totals(user_id) == (0, 60, 3)
+    assert [t['amount'] for t in login('driver').get('/api/wallet/transactions').get_json()['transactions']] == [30, 20, 10]
+    export = login('admin').get('/api/admin/export/transactions?format=ndjson').get_data(as_text=True)
+    assert len(export.splitlines()) == 3
+
+    assert archive_old_records()['transactions'] == 2
+    assert [t.amount for t in Transaction.query] == [30]
+    assert wallet_totals(user_id) == (0, 60, 3)
+
+def test_wallet_history_interleaves_archived_rows_with_old_pending_ones(make_user):
+    user_id = make_user('driver').id
+    # Withdrawals still waiting on the bank are never archived, however old
+    pending_ids = []
+    for age_days in (99, 100):
+        pending = create_transaction(user_id, 50, 'debit', 'Money withdrawn to HDFC account',
+                                     payment_method='bank_transfer', status='pending')
+        pending.created_at = datetime.utcnow() - timedelta(days=age_days)
+        db.session.commit()
+        pending_ids.append(pending.id)
+    archived_id = add_old_credit(user_id, 20, age_days=95)
+    recent_id = add_old_credit(user_id, 10, age_days=0)
+    assert archive_old_records()['transactions'] == 1
+
+    seen, cursor = [], None
+    while True:
+        transactions, cursor = wallet_transactions_page(user_id, cursor, limit=1)
+        seen.extend(transaction.id for transaction in transactions)
+        if cursor is None:
+            break
+
+    assert seen == [recent_id, archived_id] + pending_ids
@@ -0,0 +1,75 @@
+# Parking App V1/tests/test_booking.py
+import threading
+import pytest
+from models.models import db, User, ParkingLot, Reservation
+from booking import book_spot_for_user, LotFullError, ActiveReservationError
+
+BOOKERS = 60
+SPOTS = 40
+
+def test_concurrent_bookers_never_share_a_spot_or_hold_two(app, make_lot):
+    lot = make_lot(rows=4, cols=10)
+    lot_id = lot.id
+    # Plain rows without password hashes keep setup fast
+    db.session.execute(User.__table__.insert(), [
+        {'username': f'booker{i}', 'email': f'booker{i}@example.com', 'password': 'x', 'role': 'user', 'balance': 100.0}
+        for i in range(BOOKERS)
+    ])
+    db.session.commit()
+    user_ids = [user_id for (user_id,) in db.session.query(User.id)]
+
+    outcomes = {'booked': 0, 'full': 0, 'duplicate': 0}
+    errors = []
+    lock = threading.Lock()
+    start = threading.Barrier(BOOKERS)
+
+    def booker(user_id):
+        with app.app_context():
+            start.wait()
+            # Each user tries twice; the second attempt must be refused while the first is open
+            for _ in range(2):
+                try:
+                    book_spot_for_user(db.session.get(User, user_id), db.session.get(ParkingLot, lot_id))
+                    outcome = 'booked'
+                except LotFullError:
+                    outcome = 'full'
+                except ActiveReservationError:
+                    outcome = 'duplicate'
+                except Exception as e:
+                    with lock:
+                        errors.append(repr(e))
+                    continue
+                with lock:
+                    outcomes[outcome] += 1
+
+    threads = [threading.Thread(target=booker, args=(user_id,)) for user_id in user_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert outcomes['booked'] == SPOTS
+    assert sum(outcomes.values()) == 2 * BOOKERS
+
+    db.session.expire_all()
+    open_reservations = Reservation.query.filter(Reservation.end_time.is_(None)).all()
+    assert len(open_reservations) == SPOTS
+    assert len({r.spot_id for r in open_reservations}) == SPOTS
+    assert len({r.user_id for r in open_reservations}) == SPOTS
+
+    lot = db.session.get(ParkingLot, lot_id)
+    assert lot.occupied_spots == SPOTS
+    assert lot.refresh_occupancy() == SPOTS
+
+def test_second_open_reservation_is_rejected_by_the_database(make_lot, make_user):
+    lot = make_lot(rows=1, cols=2)
+    user = make_user('driver', balance=100)
+    book_spot_for_user(user, lot)
+
+    with pytest.raises(ActiveReservationError):
+        book_spot_for_user(user, lot)
+
+    db.session.expire_all()
+    assert Reservation.query.filter_by(user_id=user.id).count() == 1
+    assert db.session.get(ParkingLot, lot.id).occupied_spots == 1
@@ -0,0 +1,63 @@
+# Parking App V1/tests/test_bulk_checkout.py
+import pytest
+import checkout
+from models.models import db, User, ParkingLot, Reservation
+from booking import book_spot_for_user
+
+def book_drivers(lot, count):
+    """Books one spot in the lot for each of count new users and returns the reservation ids."""
+    db.session.execute(User.__table__.insert(), [
+        {'username': f'driver{i}', 'email': f'driver{i}@example.com', 'password': 'x', 'role': 'user', 'balance': 100.0}
+        for i in range(count)
+    ])
+    db.session.commit()
+    drivers = User.query.filter(User.username.like('driver%')).all()
+    return [book_spot_for_user(user, lot).id for user in drivers]
+
+@pytest.fixture
+def admin_client(make_user, login):
+    make_user('admin', role='admin')
+    return login('admin')
+
+@pytest.mark.parametrize('payload', [
+    {'reservation_ids': '123'},
+    {'reservation_ids': ['1', '2']},
+    {'reservation_ids': [True]},
+    {'reservation_ids': 1},
+    {'lot_id': '1'},
+    {'lot_id': [1]},
+])
+def test_malformed_ids_are_rejected(admin_client, make_lot, payload):
+    lot = make_lot(rows=1, cols=3)
+    book_drivers(lot, 3)
+
+    response = admin_client.post('/api/admin/bulk_checkout', json=payload)
+
+    assert response.status_code == 400
+    assert Reservation.query.filter(Reservation.end_time.is_(None)).count() == 3
+
+def test_lot_larger_than_one_batch_is_released_in_chunks(admin_client, make_lot, monkeypatch):
+    monkeypatch.setattr(checkout, 'BULK_CHECKOUT_LIMIT', 5)
+    lot = make_lot(rows=3, cols=5)
+    lot_id = lot.id
+    reservation_ids = book_drivers(lot, 12)
+
+    response = admin_client.post('/api/admin/bulk_checkout', json={'lot_id': lot_id})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['released'] == 12
+    assert sorted(r['reservation_id'] for r in body['results']) == sorted(reservation_ids)
+    db.session.expire_all()
+    assert Reservation.query.filter(Reservation.end_time.is_(None)).count() == 0
+    lot = db.session.get(ParkingLot, lot_id)
+    assert lot.occupied_spots == 0 == lot.refresh_occupancy()
+
+def test_id_list_over_the_limit_is_rejected(admin_client, make_lot, monkeypatch):
+    monkeypatch.setattr(checkout, 'BULK_CHECKOUT_LIMIT', 2)
+    reservation_ids = book_drivers(make_lot(rows=1, cols=3), 3)
+
+    response = admin_client.post('/api/admin/bulk_checkout', json={'reservation_ids': reservation_ids})
+
+    assert response.status_code == 400
+    assert Reservation.query.filter(Reservation.end_time.is_(None)).count() == 3
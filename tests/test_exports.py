@@ -0,0 +1,50 @@
+# Parking App V1/tests/test_exports.py
+import json
+from datetime import datetime
+import pytest
+from models.models import db, Reservation, ParkingSpot
+
+@pytest.fixture
+def admin_client(make_user, login):
+    make_user('admin', role='admin')
+    return login('admin')
+
+@pytest.fixture
+def stays(make_lot, make_user):
+    """One stay in each of two lots, in January and March 2024."""
+    user_id = make_user('driver').id
+    for lot, start in ((make_lot(name='First'), datetime(2024, 1, 10, 9)), (make_lot(name='Second'), datetime(2024, 3, 10, 9))):
+        spot = ParkingSpot.query.filter_by(lot_id=lot.id).first()
+        db.session.add(Reservation(user_id=user_id, spot_id=spot.id, start_time=start, end_time=start, cost=0.0,
+                                   status='completed'))
+    db.session.commit()
+
+def exported(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+@pytest.mark.parametrize('query, message', [
+    ('lot_id=abc', 'lot_id'),
+    ('lot_id=-1', 'lot_id'),
+    ('lot_id=1.5', 'lot_id'),
+    ('start=2024-13-01', 'start'),
+    ('end=yesterday', 'end'),
+    ('start=2024-03-01&end=2024-01-01', 'start must not be after end'),
+])
+def test_malformed_filters_are_rejected(admin_client, stays, query, message):
+    response = admin_client.get(f'/api/admin/export/reservations?format=ndjson&{query}')
+
+    assert response.status_code == 400
+    assert message in response.get_json()['error']
+
+def test_filters_narrow_the_export(admin_client, stays):
+    everything = exported(admin_client.get('/api/admin/export/reservations?format=ndjson'))
+    first_lot = everything[0]['lot_id']
+
+    by_lot = exported(admin_client.get(f'/api/admin/export/reservations?format=ndjson&lot_id={first_lot}'))
+    by_date = exported(admin_client.get('/api/admin/export/reservations?format=ndjson&start=2024-03-01&end=2024-03-10'))
+    same_day = exported(admin_client.get('/api/admin/export/reservations?format=ndjson&start=2024-01-10&end=2024-01-10'))
+
+    assert len(everything) == 2
+    assert [row['lot_id'] for row in by_lot] == [first_lot]
+    assert [row['start_time'][:10] for row in by_date] == ['2024-03-10']
+    assert [row['start_time'][:10] for row in same_day] == ['2024-01-10']
@@ -0,0 +1,18 @@
+# Parking App V1/tests/test_loadtest.py
+import pytest
+from loadtest import percentile
+
+@pytest.mark.parametrize('count, pct, rank', [
+    (102, 50, 51),
+    (100, 50, 50),
+    (100, 95, 95),
+    (100, 99, 99),
+    (100, 7, 7),
+    (10, 99, 10),
+    (1, 50, 1),
+    (3, 50, 2),
+])
+def test_percentile_is_nearest_rank(count, pct, rank):
+    # Values are rank / 1000 seconds, so the reported milliseconds are the rank itself
+    ordered = [i / 1000 for i in range(1, count + 1)]
+    assert percentile(ordered, pct) == rank
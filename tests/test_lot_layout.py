@@ -0,0 +1,74 @@
+# Parking App V1/tests/test_lot_layout.py
+import time
+from models.models import db, ParkingLot, ParkingSpot
+from booking import book_spot_for_user
+from query_counter import count_queries
+from controllers.admin_controller import layout_cache
+
+def occupy_elsewhere(lot_id):
+    """Books a spot the way another worker process would: straight in the database, with no local version bump."""
+    spot = ParkingSpot.query.filter_by(lot_id=lot_id, status='A').first()
+    spot.status = 'O'
+    db.session.execute(db.update(ParkingLot).where(ParkingLot.id == lot_id)
+                       .values(occupied_spots=ParkingLot.occupied_spots + 1))
+    db.session.commit()
+
+def test_unchanged_layout_revalidates_with_a_304(app, make_lot):
+    lot_id = make_lot(rows=2, cols=3).id
+    client = app.test_client()
+
+    first = client.get(f'/api/lot/{lot_id}/layout')
+    assert first.status_code == 200
+    with count_queries() as stats:
+        again = client.get(f'/api/lot/{lot_id}/layout', headers={'If-None-Match': first.headers['ETag']})
+
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert stats.count == 1
+
+def test_local_booking_changes_the_layout(app, make_lot, make_user):
+    lot = make_lot(rows=2, cols=3)
+    client = app.test_client()
+    etag = client.get(f'/api/lot/{lot.id}/layout').headers['ETag']
+
+    book_spot_for_user(make_user('driver', balance=100), lot)
+    response = client.get(f'/api/lot/{lot.id}/layout', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_booking_from_another_process_is_not_served_stale(app, make_lot):
+    lot_id = make_lot(rows=2, cols=3).id
+    client = app.test_client()
+    first = client.get(f'/api/lot/{lot_id}/layout')
+
+    occupy_elsewhere(lot_id)
+    response = client.get(f'/api/lot/{lot_id}/layout', headers={'If-None-Match': first.headers['ETag']})
+
+    assert response.status_code == 200
+    statuses = [cell['status'] for row in response.get_json()['layout'] for cell in row]
+    assert statuses.count('O') == 1
+
+def test_cached_layouts_expire(app, make_lot):
+    lot_id = make_lot(rows=1, cols=2).id
+    client = app.test_client()
+
+    def statuses():
+        layout = client.get(f'/api/lot/{lot_id}/layout').get_json()['layout']
+        return [cell['status'] for row in layout for cell in row]
+
+    ttl = layout_cache.ttl
+    layout_cache.ttl = 0.05
+    try:
+        assert statuses() == ['A', 'A']
+        # Maintenance changes made elsewhere leave the occupied count alone, so only the TTL catches them
+        db.session.execute(db.update(ParkingSpot).where(ParkingSpot.lot_id == lot_id).values(status='M'))
+        db.session.commit()
+        assert statuses() == ['A', 'A']
+        time.sleep(0.1)
+        assert statuses() == ['M', 'M']
+    finally:
+        layout_cache.ttl = ttl
+
+def test_unknown_lot_is_a_404(app, database):
+    assert app.test_client().get('/api/lot/999/layout').status_code == 404
@@ -0,0 +1,39 @@
+# Parking App V1/tests/test_metrics.py
+import threading
+from metrics import Counter, SHARD_PRUNE_THRESHOLD
+
+def run_threads(count, target):
+    for _ in range(count):
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+
+def test_finished_threads_do_not_pile_up_without_a_scrape():
+    counter = Counter('test_requests_total', "Requests.", ('route',))
+
+    run_threads(2000, lambda: counter.inc(('home',)))
+
+    assert counter._counts.shard_count() < SHARD_PRUNE_THRESHOLD
+    assert counter._counts.totals() == {('home',): 2000}
+
+def test_live_threads_keep_their_counts():
+    counter = Counter('test_requests_total', "Requests.")
+    started, finish = threading.Barrier(101), threading.Event()
+
+    def worker():
+        counter.inc()
+        started.wait()
+        finish.wait()
+        counter.inc()
+
+    threads = [threading.Thread(target=worker) for _ in range(100)]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    run_threads(500, counter.inc)
+    assert counter._counts.totals() == {(): 600}
+
+    finish.set()
+    for thread in threads:
+        thread.join()
+    assert counter._counts.totals() == {(): 700}
@@ -0,0 +1,31 @@
+# Parking App V1/tests/test_query_counter.py
+import time
+import pytest
+from sqlalchemy.exc import OperationalError
+from models.models import db
+from query_counter import count_queries
+
+def test_failed_statements_leave_no_timer_state_behind(database):
+    with db.engine.connect() as connection:
+        for _ in range(50):
+            with pytest.raises(OperationalError):
+                connection.exec_driver_sql("SELECT * FROM no_such_table")
+        time.sleep(0.2)
+
+        with count_queries() as stats:
+            connection.exec_driver_sql("SELECT 1")
+
+        assert connection.info == {}
+    assert stats.count == 1
+    # Timed from its own start, not from a failed statement's
+    assert stats.total_time < 0.1
+
+def test_requests_report_their_query_count(app, make_user, login, monkeypatch):
+    make_user('driver', balance=10)
+    client = login('driver')
+    monkeypatch.setitem(app.config, 'SQL_QUERY_HEADERS', True)
+
+    response = client.get('/api/wallet/balance')
+
+    assert int(response.headers['X-Query-Count']) >= 1
+    assert float(response.headers['X-Query-Time-Ms']) >= 0
@@ -0,0 +1,36 @@
+# Parking App V1/tests/test_query_plans.py
+from datetime import datetime
+import pytest
+from models.models import db, ParkingSpot, Reservation, Payment, Transaction
+
+# The hot lookups and the index each one must use instead of scanning its table
+HOT_QUERIES = {
+    # book_spot and user_dashboard: the user's open reservation
+    'reservation_by_user': lambda: Reservation.query.filter_by(user_id=1, end_time=None),
+    # ParkingSpot.current_reservation
+    'reservation_by_spot': lambda: Reservation.query.filter_by(spot_id=1, end_time=None),
+    # Spot claiming, allocator loads and occupancy recounts
+    'spots_by_lot_status': lambda: ParkingSpot.query.filter_by(lot_id=1, status='A'),
+    # user_wallet, newest first
+    'wallet_transactions': lambda: Transaction.query.filter_by(user_id=1).order_by(
+        Transaction.created_at.desc(), Transaction.id.desc()),
+    # Revenue over a date range
+    'completed_payments_by_day': lambda: db.session.query(
+        db.func.date(Payment.completed_at), db.func.sum(Payment.amount)
+    ).filter(
+        Payment.payment_status == 'completed',
+        Payment.completed_at >= datetime(2024, 1, 1),
+        Payment.completed_at < datetime(2024, 2, 1)
+    ).group_by(db.func.date(Payment.completed_at)),
+}
+
+def query_plan(query):
+    sql = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    return [row[3] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(database, name):
+    plan = query_plan(HOT_QUERIES[name]())
+
+    assert any(step.startswith('SEARCH') for step in plan), plan
+    assert not [step for step in plan if step.startswith('SCAN')], plan
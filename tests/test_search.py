@@ -0,0 +1,106 @@
+# Parking App V1/tests/test_search.py
+import pytest
+import search
+from models.models import db, ParkingLot
+from search import search_lots, ensure_lot_search_index, LOT_FTS_TABLE
+
+LOTS = [
+    # name, address, pin code, price, spots, occupied, features
+    ('MG Road Central', '12 MG Road', '560001', 40.0, 10, 2, {'has_security': True, 'is_covered': True}),
+    ('Brigade Road Plaza', '5 Brigade Road', '560025', 30.0, 10, 10, {'has_security': True}),
+    ('Koramangala Hub', '80 Feet Road', '560034', 20.0, 20, 5, {'has_lighting': True}),
+    ('Indiranagar Stop', '100 Feet Road', '560038', 50.0, 5, 0, {}),
+]
+
+@pytest.fixture
+def lots(database):
+    for name, address, pin_code, price, spots, occupied, features in LOTS:
+        db.session.add(ParkingLot(prime_location_name=name, address=address, pin_code=pin_code, price_per_hour=price,
+                                  layout_rows=1, layout_cols=spots, max_spots=spots, max_parking_limit=100,
+                                  occupied_spots=occupied, **features))
+    db.session.commit()
+
+@pytest.fixture(params=['fts', 'like'])
+def text_search(request, lots, monkeypatch):
+    """Runs a test once against the FTS index and once against the LIKE fallback."""
+    if request.param == 'like':
+        monkeypatch.setattr(search, 'lot_fts_available', lambda: False)
+    return request.param
+
+def names(**kwargs):
+    return [lot.prime_location_name for lot in search_lots(**kwargs).items]
+
+def test_create_all_builds_the_search_index(lots):
+    assert search.lot_fts_available()
+    lot = ParkingLot.query.filter_by(prime_location_name='Indiranagar Stop').one()
+    lot.prime_location_name = 'Whitefield Stop'
+    db.session.commit()
+
+    assert names(text='whitef') == ['Whitefield Stop']
+    assert names(text='indira') == []
+
+@pytest.mark.parametrize('text, expected', [
+    ('mg', ['MG Road Central']),
+    ('brig', ['Brigade Road Plaza']),
+    ('kor', ['Koramangala Hub']),
+    ('nowhere', []),
+])
+def test_text_matches_name_or_address_prefix(text_search, text, expected):
+    assert names(text=text) == expected
+
+def test_fts_requires_every_word_as_a_prefix(lots):
+    assert names(text='road', sort='name') == ['Brigade Road Plaza', 'Indiranagar Stop', 'Koramangala Hub', 'MG Road Central']
+    assert names(text='feet ro', sort='name') == ['Indiranagar Stop', 'Koramangala Hub']
+    assert names(text='mg plaza') == []
+
+@pytest.mark.parametrize('text', ['"', "'", 'OR', 'mg" OR "x', 'NEAR(', '*', 'a AND', "'; DROP TABLE parking_lots; --", '%', '_'])
+def test_hostile_text_is_matched_literally(text_search, text):
+    assert names(text=text) == []
+    assert ParkingLot.query.count() == len(LOTS)
+
+def test_filters(lots):
+    assert names(pin_code='5600') == ['Koramangala Hub', 'Brigade Road Plaza', 'MG Road Central', 'Indiranagar Stop']
+    assert names(pin_code='56003') == ['Koramangala Hub', 'Indiranagar Stop']
+    assert names(features=['has_security']) == ['Brigade Road Plaza', 'MG Road Central']
+    assert names(features=['has_security', 'is_covered']) == ['MG Road Central']
+    assert names(features=['not_a_feature']) == names()
+    assert names(min_price=30, max_price=40) == ['Brigade Road Plaza', 'MG Road Central']
+    assert names(has_free=True) == ['Koramangala Hub', 'MG Road Central', 'Indiranagar Stop']
+
+@pytest.mark.parametrize('sort, expected', [
+    ('price', ['Koramangala Hub', 'Brigade Road Plaza', 'MG Road Central', 'Indiranagar Stop']),
+    ('price_desc', ['Indiranagar Stop', 'MG Road Central', 'Brigade Road Plaza', 'Koramangala Hub']),
+    ('name', ['Brigade Road Plaza', 'Indiranagar Stop', 'Koramangala Hub', 'MG Road Central']),
+    ('available', ['Koramangala Hub', 'MG Road Central', 'Indiranagar Stop', 'Brigade Road Plaza']),
+    ('bogus', ['Koramangala Hub', 'Brigade Road Plaza', 'MG Road Central', 'Indiranagar Stop']),
+])
+def test_sorting(lots, sort, expected):
+    assert names(sort=sort) == expected
+
+def test_pages_do_not_overlap(lots):
+    first, second, third = (search_lots(sort='name', page=page, per_page=2) for page in (1, 2, 3))
+
+    assert first.total == len(LOTS) and first.pages == 2
+    assert [lot.id for lot in first.items + second.items] == [lot.id for lot in search_lots(sort='name').items]
+    assert third.items == []
+    assert len(search_lots(per_page=1000).items) == len(LOTS)
+
+def test_an_index_created_after_startup_is_used(lots):
+    db.session.execute(db.text(f"DROP TABLE {LOT_FTS_TABLE}"))
+    db.session.commit()
+    search._fts_available.clear()
+    assert not search.lot_fts_available()
+
+    assert ensure_lot_search_index()
+
+    assert search.lot_fts_available()
+    assert names(text='mg ro') == ['MG Road Central']
+
+def test_search_api_reads_the_query_string(lots, make_user, login):
+    make_user('driver')
+    response = login('driver').get('/api/lots/search?q=road&has_free=1&per_page=2&page=x&min_price=abc&sort=price')
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [lot['name'] for lot in body['lots']] == ['Koramangala Hub', 'MG Road Central']
+    assert body['total'] == 3
@@ -0,0 +1,57 @@
+# Parking App V1/tests/test_settlement.py
+import sqlite3
+from models.models import db, User, Transaction
+from settlement import Settlement, FakeBank
+from utils import create_transaction
+from config import database_path
+
+class ContendedBank(FakeBank):
+    """Rejects the listed amounts, and on every transfer has a separate connection try to write without waiting."""
+
+    def __init__(self, app, rejected=()):
+        super().__init__()
+        self.path = database_path(app)
+        self.rejected = set(rejected)
+        self.blocked = []
+
+    def transfer(self, reference_id, amount):
+        writer = sqlite3.connect(self.path, timeout=0)
+        try:
+            writer.execute("UPDATE users SET phone = '555' WHERE username = 'other'")
+            writer.commit()
+        except sqlite3.OperationalError as e:
+            self.blocked.append(str(e))
+        finally:
+            writer.close()
+        return amount not in self.rejected
+
+def queue_withdrawal(user_id, amount, status='pending'):
+    create_transaction(user_id, amount, 'debit', 'Money withdrawn to HDFC account',
+                       payment_method='bank_transfer', status=status)
+    db.session.commit()
+
+def test_bank_is_called_without_holding_the_write_lock(app, make_user):
+    user_id = make_user('driver', balance=100).id
+    make_user('other')
+    for amount in (50, 60, 70):
+        queue_withdrawal(user_id, amount)
+    bank = ContendedBank(app, rejected={60})
+
+    assert Settlement(bank, batch_size=10).settle_batch() == (2, 1, 3)
+
+    assert bank.blocked == []
+    db.session.expire_all()
+    statuses = dict(db.session.query(Transaction.amount, Transaction.status))
+    assert statuses == {50: 'completed', 60: 'failed', 70: 'completed'}
+    # Only the rejected transfer goes back to the wallet
+    assert db.session.get(User, user_id).balance == 160
+
+def test_withdrawals_left_processing_are_settled_once(app, make_user):
+    user_id = make_user('driver', balance=0).id
+    queue_withdrawal(user_id, 50, status='processing')
+    settlement = Settlement(FakeBank(), batch_size=10)
+
+    assert settlement.settle_batch() == (1, 0, 1)
+    assert settlement.settle_batch() == (0, 0, 0)
+    db.session.expire_all()
+    assert db.session.query(Transaction.status).scalar() == 'completed'
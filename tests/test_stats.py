@@ -0,0 +1,74 @@
+# Parking App V1/tests/test_stats.py
+from datetime import datetime, timedelta
+from models.models import db, SystemStats, BookingHourlyStats, ParkingSpot, Reservation, Payment
+from booking import book_spot_for_user
+from checkout import bulk_checkout
+from archive import archive_old_records
+from stats import backfill_missing_stats, backfill_hourly_stats
+
+def rollup_totals():
+    return (db.session.query(db.func.sum(SystemStats.total_revenue), db.func.sum(SystemStats.total_reservations)).one(),
+            db.session.query(db.func.sum(BookingHourlyStats.bookings), db.func.sum(BookingHourlyStats.revenue)).one())
+
+def test_empty_rollups_are_backfilled_from_history(make_lot, make_user):
+    lot = make_lot(price=40.0)
+    for i in range(3):
+        reservation = book_spot_for_user(make_user(f'driver{i}', balance=500), lot)
+        reservation.start_time -= timedelta(hours=2)
+        db.session.commit()
+        bulk_checkout(reservation_ids=[reservation.id])
+    db.session.expire_all()
+    expected = rollup_totals()
+    assert expected[0][1] == 3 and expected[0][0] > 0
+
+    assert backfill_missing_stats() == []
+
+    db.session.query(SystemStats).delete()
+    db.session.query(BookingHourlyStats).delete()
+    db.session.commit()
+
+    assert backfill_missing_stats() == ['system_stats', 'booking_hourly_stats']
+    db.session.commit()
+    assert rollup_totals() == expected
+
+def test_nothing_is_backfilled_without_history(database):
+    assert backfill_missing_stats() == []
+    assert SystemStats.query.count() == 0
+
+def hourly_rows():
+    return db.session.query(
+        BookingHourlyStats.lot_id, BookingHourlyStats.date, BookingHourlyStats.hour,
+        BookingHourlyStats.bookings, BookingHourlyStats.revenue, BookingHourlyStats.minutes_parked
+    ).order_by(BookingHourlyStats.date, BookingHourlyStats.hour, BookingHourlyStats.lot_id).all()
+
+def test_hourly_backfill_reads_archived_stays_and_payments(make_lot, make_user):
+    first, second = make_lot(name='First'), make_lot(name='Second')
+    user_id = make_user('driver').id
+    day = datetime(2024, 1, 15, 8, 0)
+    # Four 90-minute stays, one per hour; every other one paid when it ends
+    for i, lot in enumerate((first, second, first, second)):
+        spot = ParkingSpot.query.filter_by(lot_id=lot.id).first()
+        start = day + timedelta(hours=i)
+        reservation = Reservation(user_id=user_id, spot_id=spot.id, start_time=start,
+                                  end_time=start + timedelta(minutes=90), cost=30.0, status='completed')
+        db.session.add(reservation)
+        db.session.flush()
+        if i % 2 == 0:
+            db.session.add(Payment(user_id=user_id, reservation_id=reservation.id, amount=30.0, payment_method='wallet',
+                                   payment_status='completed', payment_date=reservation.end_time,
+                                   completed_at=reservation.end_time))
+    db.session.commit()
+
+    assert backfill_hourly_stats() == 8
+    db.session.commit()
+    expected = hourly_rows()
+    assert sum(row.bookings for row in expected) == 4
+    assert sum(row.revenue for row in expected) == 60.0
+    assert sum(row.minutes_parked for row in expected) == 360.0
+    # The 08:00 stay on the first lot ended, paid, at 09:30; nothing else touched that lot in that hour
+    assert (first.id, day.date(), 9, 0, 30.0, 90.0) in expected
+
+    assert archive_old_records() == {'reservations': 3, 'payments': 1, 'transactions': 0}
+    backfill_hourly_stats()
+    db.session.commit()
+    assert hourly_rows() == expected
@@ -0,0 +1,26 @@
+# Parking App V1/tests/test_synthetic_data.py
+from datetime import date, datetime
+from models.models import db, Reservation, Payment, Transaction
+from synthetic_data import generate_synthetic_data
+
+def history():
+    return [db.session.execute(db.select(model.__table__).order_by(model.id)).all()
+            for model in (Reservation, Payment, Transaction)]
+
+def clear_tables():
+    for table in reversed(db.metadata.sorted_tables):
+        db.session.execute(table.delete())
+    db.session.commit()
+
+def test_same_seed_and_end_date_give_the_same_rows(database):
+    generate_synthetic_data(lots=2, users=20, reservations=200, seed=7, days=10, end_date=date(2024, 3, 1))
+    first = history()
+    clear_tables()
+
+    generate_synthetic_data(lots=2, users=20, reservations=200, seed=7, days=10, end_date=date(2024, 3, 1))
+
+    assert history() == first
+    reservations = first[0]
+    assert len(reservations) > 200
+    # Ten days of history, including the still-open reservations, all before the end date
+    assert all(datetime(2024, 2, 20) <= row.start_time < datetime(2024, 3, 1) for row in reservations)
@@ -0,0 +1,62 @@
+# Parking App V1/tests/test_wallet.py
+from datetime import datetime, timedelta
+from models.models import db, User, Reservation
+from booking import book_spot_for_user
+
+def set_balance_elsewhere(user_id, balance):
+    """Changes the stored balance the way another process would, behind the logged-in user's back."""
+    db.session.execute(db.update(User).where(User.id == user_id).values(balance=balance))
+    db.session.commit()
+
+def stored_balance(user_id):
+    db.session.expire_all()
+    return db.session.get(User, user_id).balance
+
+def test_balance_is_read_fresh_on_every_request(make_user, login):
+    user_id = make_user('driver', balance=100).id
+    client = login('driver')
+    assert client.get('/api/wallet/balance').get_json() == {'balance': 100}
+
+    set_balance_elsewhere(user_id, 20)
+
+    assert client.get('/api/wallet/balance').get_json() == {'balance': 20}
+
+def test_add_money_adds_to_the_stored_balance(make_user, login):
+    user_id = make_user('driver', balance=100).id
+    client = login('driver')
+    client.get('/api/wallet/balance')
+
+    set_balance_elsewhere(user_id, 20)
+    client.post('/add_money', data={'amount': '10', 'payment_method': 'upi'})
+
+    assert stored_balance(user_id) == 30
+
+def test_withdrawal_checks_the_stored_balance(make_user, login):
+    user_id = make_user('driver', balance=100).id
+    client = login('driver')
+    client.get('/api/wallet/balance')
+
+    set_balance_elsewhere(user_id, 60)
+    client.post('/withdraw_money', data={'amount': '80', 'bank_account': 'HDFC'})
+    assert stored_balance(user_id) == 60
+
+    client.post('/withdraw_money', data={'amount': '50', 'bank_account': 'HDFC'})
+    assert stored_balance(user_id) == 10
+
+def test_release_charges_the_stored_balance(make_lot, make_user, login):
+    lot = make_lot(rows=1, cols=2, price=20)
+    user = make_user('driver', balance=100)
+    user_id = user.id
+    reservation = book_spot_for_user(user, lot)
+    reservation.start_time = datetime.utcnow() - timedelta(hours=2)
+    db.session.commit()
+    reservation_id = reservation.id
+    client = login('driver')
+    client.get('/api/wallet/balance')
+
+    # Two hours at 20/h is about 40, which the cached 100 would cover but the stored 30 does not
+    set_balance_elsewhere(user_id, 30)
+    client.post(f'/release/{reservation_id}')
+
+    assert stored_balance(user_id) == 30
+    assert db.session.get(Reservation, reservation_id).status == 'pending_payment'
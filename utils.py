@@ -1,32 +1,95 @@
 # Parking App V1/utils.py
-from models.models import db, ParkingSpot, Transaction # Import necessary models and db
+from models.models import db, User, ParkingSpot, Reservation, Transaction # Import necessary models and db
 from datetime import datetime
 import time
 import uuid
+from archive import ARCHIVE_TABLES, with_archive
 
 def generate_spot_number(row, col):
     """Generates a parking spot number based on row and column."""
     return f"{chr(65 + row)}{col + 1}"
 
+# Rows per executemany round-trip when provisioning spots
+SPOT_INSERT_BATCH_SIZE = 1000
+
+def insert_spots(lot_id, cells, batch_size=SPOT_INSERT_BATCH_SIZE):
+    """Bulk-inserts available spots for an iterable of (row, col) cells. Caller commits."""
+    batch = []
+    for row, col in cells:
+        batch.append({
+            'lot_id': lot_id,
+            'spot_number': generate_spot_number(row, col),
+            'row_position': row,
+            'col_position': col,
+            'status': 'A'
+        })
+        if len(batch) >= batch_size:
+            db.session.execute(ParkingSpot.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(ParkingSpot.__table__.insert(), batch)
+
 def create_spots_for_lot(lot):
     """Creates parking spots for a given parking lot based on its layout."""
-    for row in range(lot.layout_rows):
-        for col in range(lot.layout_cols):
-            spot_number = generate_spot_number(row, col)
-            spot = ParkingSpot(
-                lot_id=lot.id,
-                spot_number=spot_number,
-                row_position=row,
-                col_position=col,
-                status='A'
-            )
-            db.session.add(spot)
+    insert_spots(lot.id, ((row, col) for row in range(lot.layout_rows) for col in range(lot.layout_cols)))
+
+def build_spot_grids(lots):
+    """Builds the admin spot_grid for each lot using one query for spots and one for active reservations."""
+    lot_ids = [lot.id for lot in lots]
+    if not lot_ids:
+        return {}
+
+    spots = ParkingSpot.query.filter(ParkingSpot.lot_id.in_(lot_ids)).all()
+
+    active = db.session.query(Reservation, User).join(
+        User, Reservation.user_id == User.id
+    ).join(
+        ParkingSpot, Reservation.spot_id == ParkingSpot.id
+    ).filter(
+        Reservation.end_time.is_(None),
+        ParkingSpot.lot_id.in_(lot_ids)
+    ).all()
+    active_by_spot = {reservation.spot_id: (reservation, user) for reservation, user in active}
+
+    spots_by_cell = {}
+    for spot in spots:
+        spots_by_cell.setdefault(spot.lot_id, {})[(spot.row_position, spot.col_position)] = spot
+
+    grids = {}
+    for lot in lots:
+        cells = spots_by_cell.get(lot.id, {})
+        spot_grid = []
+        for row in range(lot.layout_rows):
+            row_spots = []
+            for col in range(lot.layout_cols):
+                spot = cells.get((row, col))
+                if spot:
+                    reservation, user_booked = active_by_spot.get(spot.id, (None, None))
+                    row_spots.append({
+                        'spot': spot,
+                        'occupied_by': user_booked.username if user_booked else None,
+                        'start_by_id': user_booked.id if user_booked else None,
+                        'start_time': reservation.start_time.strftime('%H:%M, %d %b %Y') if reservation else None,
+                        'duration': f"{reservation.duration_hours():.1f}h" if reservation else None,
+                        'vehicle_number': user_booked.vehicle_number if user_booked else None,
+                        'vehicle_type': user_booked.vehicle_type if user_booked else None,
+                        'reservation_id': reservation.id if reservation else None
+                    })
+                else:
+                    row_spots.append(None)
+            spot_grid.append(row_spots)
+        grids[lot.id] = spot_grid
+    return grids
+
+def generate_reference_id(transaction_type):
+    """Builds a unique transaction reference such as DEBIT_1718000000_1A2B3C4D."""
+    return f"{transaction_type.upper()}_{int(time.time())}_{uuid.uuid4().hex[:8].upper()}"
 
 def create_transaction(user_id, amount, transaction_type, description, reference_id=None, payment_method=None, status='completed'):
     """Creates a new transaction record in the database."""
     try:
         if not reference_id:
-            reference_id = f"{transaction_type.upper()}_{int(time.time())}_{uuid.uuid4().hex[:8].upper()}"
+            reference_id = generate_reference_id(transaction_type)
 
         transaction = Transaction(
             user_id=user_id,
@@ -42,4 +105,81 @@ def create_transaction(user_id, amount, transaction_type, description, reference
         return transaction
     except Exception as e:
         print(f"Error creating transaction: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def credit_balance(user_id, amount):
+    """Adds amount to the user's wallet in SQL, so a stale in-memory balance is never written back. Caller commits."""
+    db.session.execute(
+        db.update(User)
+        .where(User.id == user_id)
+        .values(balance=User.balance + amount)
+        .execution_options(synchronize_session=False)
+    )
+
+def debit_balance(user_id, amount):
+    """Takes amount off the user's wallet only if the stored balance covers it; returns False if it does not.
+
+    The check and the debit are one UPDATE, so concurrent debits cannot overdraw the wallet. Caller commits.
+    """
+    result = db.session.execute(
+        db.update(User)
+        .where(User.id == user_id, User.balance >= amount)
+        .values(balance=User.balance - amount)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+# Transactions per wallet page, shared by the wallet view and its JSON API
+WALLET_PAGE_SIZE = 20
+
+def encode_wallet_cursor(transaction):
+    """Encodes a transaction's (created_at, id) keyset position as an opaque cursor string."""
+    return f"{transaction.created_at.isoformat()}_{transaction.id}"
+
+def decode_wallet_cursor(cursor):
+    """Decodes a cursor from encode_wallet_cursor; raises ValueError if it is malformed."""
+    created_at, _, transaction_id = cursor.rpartition('_')
+    return datetime.fromisoformat(created_at), int(transaction_id)
+
+def wallet_transactions_page(user_id, cursor=None, limit=WALLET_PAGE_SIZE):
+    """Returns (transactions, next_cursor), newest first, seeking past the cursor instead of using OFFSET.
+
+    Both the hot table and the archive are read past the same keyset and merged, since pending or processing
+    rows stay live however old they are and can sit between archived ones.
+    """
+    position = None
+    if cursor:
+        position = decode_wallet_cursor(cursor)
+
+    def page(table):
+        query = db.select(table).where(table.c.user_id == user_id)
+        if position:
+            created_at, transaction_id = position
+            query = query.where(db.or_(
+                table.c.created_at < created_at,
+                db.and_(table.c.created_at == created_at, table.c.id < transaction_id)
+            ))
+        # Fetch one extra row to learn whether another page exists
+        query = query.order_by(table.c.created_at.desc(), table.c.id.desc()).limit(limit + 1)
+        return db.session.query(Transaction).from_statement(query).all()
+
+    # A row caught between the archive copy and the live delete is read from both; keep it once
+    merged = {transaction.id: transaction
+              for transaction in page(Transaction.__table__) + page(ARCHIVE_TABLES[Transaction])}
+    transactions = sorted(merged.values(),
+                          key=lambda transaction: (transaction.created_at, transaction.id), reverse=True)
+
+    next_cursor = encode_wallet_cursor(transactions[limit - 1]) if len(transactions) > limit else None
+    return transactions[:limit], next_cursor
+
+def wallet_totals(user_id):
+    """Returns (total_spent, total_added, transaction_count) for the user over live and archived history."""
+    history = with_archive(Transaction, ('type', 'status', 'amount'), lambda c: c.user_id == user_id)
+    total_spent, total_added, transaction_count = db.session.query(
+        # A failed withdrawal was refunded to the balance, so it does not count as spent
+        db.func.sum(db.case((db.and_(history.c.type.in_(['debit', 'reservation_payment']), history.c.status != 'failed'),
+                             history.c.amount), else_=0)),
+        db.func.sum(db.case((history.c.type == 'credit', history.c.amount), else_=0)),
+        db.func.count()
+    ).select_from(history).one()
+    return total_spent or 0, total_added or 0, transaction_count